@@ -1,11 +1,25 @@
 import streamlit as st
-import pandas as pd
+import functools
+import logging
+import os
 import time
-import difflib
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import json
+import uuid
+from array import array
 import streamlit.components.v1 as components
+from streamlit.errors import StreamlitAPIException
+from attempts import AttemptLog, AttemptStats
+from corpus import ALL, Corpus
+import decks
+from grading import diff_strings, grade_batch
+from metrics import Metrics, TimedUserStore
+from references import BOOKS, addresses_match
+from scheduler import QUALITY_REVEALED, Scheduler, decode_states, encode_states, quality_for, today
+from storage import FIELDS, create_store
+from study_navigator import study_navigator
+from verse_set import VerseSet
+from write_behind import WriteBehindQueue
+
+logger = logging.getLogger("bible.app")
 
 # --- 페이지 설정 ---
 st.set_page_config(page_title="100절 암송학교", layout="centered")
@@ -19,6 +33,9 @@ st.markdown("""
     .red-heart { color: red; font-size: 24px; cursor: pointer; }
     .gray-heart { color: gray; font-size: 24px; cursor: pointer; }
     .correct { color: green; font-weight: bold; font-size: 24px; text-align: center; }
+    /* 정답 표시는 브라우저에서 1초 뒤 사라짐 (서버는 기다리지 않음) */
+    .correct-flash { animation: correct-fade 0.4s ease-in 1s forwards; }
+    @keyframes correct-fade { to { opacity: 0; height: 0; margin: 0; } }
     .incorrect { color: red; font-weight: bold; }
     .diff-red {
     color: red;
@@ -27,6 +44,8 @@ st.markdown("""
     margin: 0 2px;
 }
     .diff-green { color: green; font-weight: bold; }
+    .diff-extra { color: red; text-decoration: line-through; }
+    .diff-changed { border-bottom: 2px solid red; }
     .login-box { padding: 20px; border: 1px solid #ddd; border-radius: 10px; margin-bottom: 20px; text-align: center; }
     
     /* 네비게이션 버튼 스타일 */
@@ -39,82 +58,215 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- 구글 시트 연결 함수 ---
-def get_google_sheet_client():
+# --- 계측 ---
+@st.cache_resource
+def get_metrics():
+    """페이지/저장소 시간 계측 (BIBLE_METRICS_FILE: 스냅샷 파일, BIBLE_PROFILE_RATE: cProfile 표본 비율)"""
+    return Metrics(
+        path=os.environ.get("BIBLE_METRICS_FILE"),
+        profile_rate=float(os.environ.get("BIBLE_PROFILE_RATE") or 0),
+        profile_dir=os.environ.get("BIBLE_PROFILE_DIR", "profiles"),
+    )
+
+METRICS = get_metrics()
+
+def fragment_rerun(name):
+    """fragment 만 다시 실행될 때도 재실행 한 번으로 계측 (전체 재실행 안에서는 시간만)"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with METRICS.rerun(st.session_state.session_id, f"fragment.{name}"):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# --- 사용자 저장소 ---
+def _storage_config():
+    """저장소 설정: 환경변수 > secrets 의 [storage] > 기본값(구글 시트)"""
+    try:
+        config = dict(st.secrets.get("storage", {}))
+    except Exception:
+        config = {}
+    if os.environ.get("BIBLE_STORAGE_BACKEND"):
+        config["backend"] = os.environ["BIBLE_STORAGE_BACKEND"]
+    if os.environ.get("BIBLE_SQLITE_PATH"):
+        config["path"] = os.environ["BIBLE_SQLITE_PATH"]
+    if config.get("backend", "sheets") == "sheets":
+        config["credentials"] = dict(st.secrets["gcp_service_account"])
+    return config
+
+@st.cache_resource
+def _create_store():
+    # 프로세스 전체에서 하나만 생성되어 모든 세션/재실행이 공유
+    store = create_store(_storage_config())
+    METRICS.add_source('store', store.stats)
+    return TimedUserStore(store, METRICS)
+
+def get_store():
     try:
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-        return client
+        return _create_store()
     except Exception as e:
+        logger.exception("저장소를 만들지 못했습니다")
+        st.error(f"데이터베이스 연결 오류: 잠시 후 다시 시도해주세요. ({e})")
         return None
 
-def load_user_data_from_sheet(nickname):
-    client = get_google_sheet_client()
-    if not client:
-        return []
+@st.cache_resource
+def _create_write_queue():
+    # 하트 클릭은 세션 상태만 바꾸고, 저장은 백그라운드에서 모아서 처리
+    queue = WriteBehindQueue(_create_store().write_many)
+    METRICS.add_source('write_queue', queue.stats)
+    return queue
 
+def get_write_queue():
     try:
-        sheet = client.open("bible_db").sheet1
-        records = sheet.get_all_records()
-        for row in records:
-            if str(row.get('Nickname')) == nickname:
-                saved_str = str(row.get('SavedVerses', ''))
-                if saved_str:
-                    return [int(x) for x in saved_str.split(',') if x.strip()]
-                return []
-        return []
+        return _create_write_queue()
     except Exception as e:
-        st.error(f"데이터베이스 연결 오류: {e}")
-        return []
+        logger.exception("저장 대기열을 만들지 못했습니다")
+        st.error(f"데이터베이스 연결 오류: 변경한 내용을 저장할 수 없습니다. ({e})")
+        return None
 
-def save_user_data_to_sheet(nickname, verse_list):
-    client = get_google_sheet_client()
-    if not client:
-        return
+@st.cache_resource
+def _create_attempt_log():
+    # 암송 기록은 모아 두었다가 append 한 번으로 덧붙임
+    log = AttemptLog(_create_store().append_attempts)
+    METRICS.add_source('attempt_log', log.stats)
+    return log
 
+def get_attempt_log():
     try:
-        sheet = client.open("bible_db").sheet1
-        data_str = ",".join(map(str, verse_list))
-        cell = sheet.find(nickname)
-        if cell:
-            sheet.update_cell(cell.row, 2, data_str)
-        else:
-            sheet.append_row([nickname, data_str])
+        return _create_attempt_log()
+    except Exception:
+        # 암송 기록은 통계용이므로 남기지 못해도 문제 풀이는 계속함
+        logger.exception("암송 기록 로그를 만들지 못했습니다")
+        return None
+
+@st.cache_resource
+def _load_attempt_stats():
+    # 지난 기록은 프로세스마다 한 번만 (통계를 켰을 때) 읽고, 이후에는 기록 로그가 새 기록만 더함
+    load = lambda: AttemptStats(_create_store().read_attempts())
+    log = get_attempt_log()
+    return log.load_stats(load) if log else load()
+
+def get_attempt_stats():
+    try:
+        return _load_attempt_stats()
+    except Exception:
+        logger.exception("암송 기록을 읽지 못했습니다")
+        return None
+
+def load_user_record(nickname):
+    """{필드: 문자열} — 아직 저장 중인 값이 있으면 그것이 최신. 읽지 못했으면 None"""
+    # 저장소나 저장 대기열이 없으면 (오류는 get_store/get_write_queue 가 보여줌) 입장하지 않음:
+    # 빈 값으로 시작하면 저장한 말씀이 없는 것처럼 보이고, 하트를 눌러도 저장되지 않음
+    queue = get_write_queue()
+    if not queue:
+        return None
+    pending = queue.pending_value(nickname) or {}
+    if all(f in pending for f in FIELDS):
+        return pending
+
+    store = get_store()
+    if not store:
+        return None
+
+    try:
+        record, stale = store.read_or_stale(nickname)
     except Exception as e:
-        st.error(f"저장 중 오류 발생: {e}")
+        # 빈 값으로 시작하면 저장한 말씀이 없는 것처럼 보이고, 다음 저장 때 덮어쓰게 됨
+        st.error(f"데이터베이스 연결 오류: 잠시 후 다시 시도해주세요. ({e})")
+        return None
+    # 홈 화면에서 알려줌 (입장 후 바로 다시 실행되므로 여기서 보여주면 사라짐)
+    st.session_state.data_stale = stale
+    return {**(record or {}), **pending}
+
+def save_deck_field(nickname, field, value):
+    """지금 묶음의 값을 바꾸고, 모든 묶음의 값을 한 칸으로 묶어 저장"""
+    values = st.session_state.user_fields.setdefault(field, {})
+    values[st.session_state.deck] = value
+    queue = get_write_queue()
+    if not queue:
+        # 오류는 get_write_queue 가 보여줌
+        return
+    queue.submit(nickname, {field: decks.pack(values)})
+
+def save_user_data_to_sheet(nickname, saved):
+    save_deck_field(nickname, 'SavedVerses', saved.encode())
+
+def save_review_states(nickname, states):
+    save_deck_field(nickname, 'Review', encode_states(states))
+
+def flush_user_data(nickname):
+    """로그아웃 전에 대기 중인 저장을 마무리"""
+    queue = get_write_queue()
+    if queue and not queue.flush(nickname):
+        st.error("저장 중 오류 발생: 잠시 후 다시 시도해주세요.")
 
 # --- 데이터 로드 ---
-@st.cache_data
-def load_data():
+DATA_FILE = "bible_verses_clean.csv"
+# python corpus.py build 로 만든 컴파일된 파일 (없거나 오래되면 CSV 를 직접 읽음)
+COMPILED_FILE = "bible_verses_clean.bin"
+STUDY_PAGE_SIZE = 100
+TEST_PAGE_SIZE = 100
+BATCH_SIZE = 10  # 한 번에 풀기: 한 번에 내는 문제 수
+LIST_PAGE_SIZE = 10  # 저장된 말씀/틀린 문제 목록 한 페이지
+SEARCH_LIMIT = 10
+
+@st.cache_resource
+def get_decks():
+    """말씀 묶음: 기본 묶음 + BIBLE_DECKS_DIR(decks/) 의 CSV (BIBLE_DECK_CACHE_MB: 읽어 둘 크기 합)"""
+    library = decks.DeckLibrary(
+        decks.discover(DATA_FILE, COMPILED_FILE, os.environ.get("BIBLE_DECKS_DIR", decks.DECKS_DIR)),
+        max_bytes=int(float(os.environ.get("BIBLE_DECK_CACHE_MB", decks.MAX_BYTES / 2**20)) * 2**20),
+    )
+    METRICS.add_source('decks', library.stats)
+    return library
+
+def load_deck(name):
+    # 본문은 필요한 부분만 읽으므로, 묶음마다 프로세스 전체에서 한 객체를 공유
     try:
-        df = pd.read_csv("bible_verses_clean.csv")
-        return df
-    except:
-        st.error("데이터 파일(bible_verses_clean.csv)을 찾을 수 없습니다.")
-        return pd.DataFrame()
+        return get_decks().get(name).corpus
+    except Exception:
+        st.error(f"말씀 묶음({decks.label(name)})의 데이터 파일을 찾을 수 없습니다.")
+        return Corpus()
+
+def load_search_index():
+    # 묶음마다 처음 검색할 때 한 번만 만들고 묶음과 함께 공유
+    return get_decks().search_index(st.session_state.deck)
 
-df = load_data()
+# 세션마다 고른 말씀 묶음 (처음에는 기본 묶음)
+if 'deck' not in st.session_state: st.session_state.deck = decks.DEFAULT
+verses = load_deck(st.session_state.deck)
 
 # --- 세션 상태 초기화 ---
 if 'page' not in st.session_state: st.session_state.page = 'login'
+if 'session_id' not in st.session_state: st.session_state.session_id = uuid.uuid4().hex[:8]
 if 'nickname' not in st.session_state: st.session_state.nickname = ""
-if 'saved_verses' not in st.session_state: st.session_state.saved_verses = []
+if 'saved_verses' not in st.session_state: st.session_state.saved_verses = VerseSet()
+if 'review_states' not in st.session_state: st.session_state.review_states = {}
+# 모든 묶음의 저장 값 {필드: {묶음: 문자열}} 과, 지금 고르지 않은 묶음의 세션 상태 {묶음: {키: 값}}
+if 'user_fields' not in st.session_state: st.session_state.user_fields = {}
+if 'deck_states' not in st.session_state: st.session_state.deck_states = {}
 
 # 학습/암송 관련 상태
 if 'study_idx' not in st.session_state: st.session_state.study_idx = 0 
 if 'study_mode_hide' not in st.session_state: st.session_state.study_mode_hide = False 
-if 'study_reveal_content' not in st.session_state: st.session_state.study_reveal_content = False 
-if 'study_reveal_addr' not in st.session_state: st.session_state.study_reveal_addr = False 
+if 'study_nav_seq' not in st.session_state: st.session_state.study_nav_seq = None 
+if 'study_jump' not in st.session_state: st.session_state.study_jump = 0 
+if 'test_start' not in st.session_state: st.session_state.test_start = 0 
+if 'test_count' not in st.session_state: st.session_state.test_count = len(verses) 
 if 'test_current_idx' not in st.session_state: st.session_state.test_current_idx = 0 
-if 'test_answers' not in st.session_state: st.session_state.test_answers = [] 
+if 'test_verse_id' not in st.session_state: st.session_state.test_verse_id = None 
+if 'test_scheduler' not in st.session_state: st.session_state.test_scheduler = None 
+# 틀린 말씀 번호만 (장절/내용은 그릴 때 말씀 목록에서 읽음)
+if 'test_answers' not in st.session_state: st.session_state.test_answers = array('I') 
 if 'test_score' not in st.session_state: st.session_state.test_score = 0 
 if 'test_hint_level' not in st.session_state: st.session_state.test_hint_level = 3 
 if 'test_status' not in st.session_state: st.session_state.test_status = 'input' 
 if 'input_key_suffix' not in st.session_state: st.session_state.input_key_suffix = 0 
 if 'test_user_content' not in st.session_state: st.session_state.test_user_content = ""
 if 'test_user_addr' not in st.session_state: st.session_state.test_user_addr = ""
+if 'test_flash' not in st.session_state: st.session_state.test_flash = False
+if 'test_question_started' not in st.session_state: st.session_state.test_question_started = time.time()
 
 # --- 도우미 함수 ---
 def go_home():
@@ -122,37 +274,89 @@ def go_home():
     st.rerun()
 
 def toggle_save(verse_id):
-    verse_id = int(verse_id)
-    if verse_id in st.session_state.saved_verses:
-        st.session_state.saved_verses.remove(verse_id)
-    else:
-        st.session_state.saved_verses.append(verse_id)
+    st.session_state.saved_verses.toggle(int(verse_id))
     save_user_data_to_sheet(st.session_state.nickname, st.session_state.saved_verses)
 
-def diff_strings(user_input, correct_text):
-    # 공백으로 단어 분리 (공백은 유지하기 위해 split(' ') 사용)
-    user_words = user_input.split(' ')
-    correct_words = correct_text.split(' ')
-
-    # 결과 리스트
-    output_parts = []
-    
-    # 정답 단어를 순차적으로 순회하며 사용자 입력과 비교
-    user_idx = 0
-    for correct_word in correct_words:
-        if user_idx < len(user_words) and user_words[user_idx] == correct_word:
-            # 일치하면 해당 단어를 그대로 출력
-            output_parts.append(correct_word)
-            user_idx += 1
-        else:
-            # 일치하지 않으면 → 빠진 단어로 간주
-            output_parts.append("<span class='diff-red'>˅</span>")
-            # 사용자 입력은 건너뛰지 않음 → 다음 단어로 비교 계속
-
-    # 사용자 입력에 남은 단어가 있다면 → 정답에 없는 추가 단어 (무시)
-    # → 우리는 정답 기준으로만 비교하므로 무시
-
-    return ' '.join(output_parts)
+# 묶음마다 따로 두는 세션 상태 (위젯 키는 묶음 이름을 넣어 따로 만듦)
+DECK_STATE = (
+    'saved_verses', 'review_states', 'study_idx', 'study_mode_hide',
+    'test_start', 'test_count', 'test_current_idx', 'test_verse_id', 'test_scheduler',
+    'test_answers', 'test_score', 'test_hint_level', 'test_status', 'test_user_content', 'test_user_addr',
+    'test_flash', 'test_question_started', 'test_batch_ids', 'test_batch_wrong',
+)
+
+def load_deck_state(name):
+    """묶음의 세션 상태: 전에 고른 적이 있으면 그때 상태, 아니면 저장 값에서 새로 (나머지는 다시 초기화됨)"""
+    state = st.session_state.deck_states.pop(name, None)
+    if state is None:
+        fields = st.session_state.user_fields
+        state = {
+            'saved_verses': VerseSet.decode(fields.get('SavedVerses', {}).get(name)),
+            'review_states': decode_states(fields.get('Review', {}).get(name)),
+        }
+    for key in DECK_STATE:
+        if key in state:
+            st.session_state[key] = state[key]
+        elif key in st.session_state:
+            del st.session_state[key]
+
+def switch_deck(name):
+    """지금 묶음의 세션 상태는 넣어 두고 다른 묶음으로"""
+    old = st.session_state.deck
+    st.session_state.deck_states[old] = {k: st.session_state[k] for k in DECK_STATE if k in st.session_state}
+    st.session_state.deck = name
+    load_deck_state(name)
+
+def update_saved(add=(), remove=()):
+    """여러 말씀의 하트를 한 번에 반영 (저장도 한 번)"""
+    saved = st.session_state.saved_verses.copy()
+    for verse_id in add:
+        saved.add(verse_id)
+    for verse_id in remove:
+        saved.discard(verse_id)
+    if saved != st.session_state.saved_verses:
+        st.session_state.saved_verses = saved
+        save_user_data_to_sheet(st.session_state.nickname, saved)
+
+def list_page(key, total):
+    """긴 목록의 페이지 선택 → 이번에 그릴 (시작, 끝)"""
+    page_count = max(1, (total - 1) // LIST_PAGE_SIZE + 1)
+    if st.session_state.get(key, 0) >= page_count:
+        # 삭제로 페이지가 줄었으면 마지막 페이지로
+        st.session_state[key] = page_count - 1
+    page_no = 0
+    if page_count > 1:
+        page_no = st.selectbox(
+            "페이지",
+            range(page_count),
+            key=key,
+            format_func=lambda p: f"{p * LIST_PAGE_SIZE + 1} ~ {min((p + 1) * LIST_PAGE_SIZE, total)} / {total}",
+        )
+    start = page_no * LIST_PAGE_SIZE
+    return start, min(start + LIST_PAGE_SIZE, total)
+
+def book_name_completion():
+    """장절 입력칸에 책 이름 자동완성 목록을 붙임 (브라우저 datalist 라 글자마다 서버를 거치지 않음)
+    약어/영어 이름은 label 에 넣어 "Gen", "롬" 을 쳐도 개역개정 이름이 나오게 함"""
+    options = ''.join(f'<option value="{names[0]} " label="{", ".join(names[1:])}">' for names in BOOKS)
+    components.html(f"""
+    <script>
+    const doc = window.parent.document;
+    if (!doc.getElementById('bible-books')) {{
+        const list = doc.createElement('datalist');
+        list.id = 'bible-books';
+        list.innerHTML = `{options}`;
+        doc.body.appendChild(list);
+    }}
+    const attach = () => doc.querySelectorAll('input[aria-label="장절 입력"]')
+        .forEach(el => el.setAttribute('list', 'bible-books'));
+    attach();
+    if (!window.parent.__bibleBooksObserver) {{
+        window.parent.__bibleBooksObserver = new MutationObserver(attach);
+        window.parent.__bibleBooksObserver.observe(doc.body, {{childList: true, subtree: true}});
+    }}
+    </script>
+    """, height=0)
 
 # --- 페이지 0: 로그인 ---
 def page_login():
@@ -167,21 +371,65 @@ def page_login():
         if nickname_input.strip():
             st.session_state.nickname = nickname_input.strip()
             with st.spinner("데이터를 불러오는 중..."):
-                st.session_state.saved_verses = load_user_data_from_sheet(st.session_state.nickname)
-            st.session_state.page = 'home'
-            st.rerun()
+                record = load_user_record(st.session_state.nickname)
+            # 읽지 못했으면 오류를 보여주고 로그인 화면에 머무름
+            if record is not None:
+                st.session_state.user_fields = {f: decks.unpack(record.get(f)) for f in FIELDS}
+                st.session_state.deck_states = {}
+                load_deck_state(st.session_state.deck)
+                st.session_state.page = 'home'
+                st.rerun()
         else:
             st.error("닉네임을 입력해주세요.")
     st.markdown("</div>", unsafe_allow_html=True)
 
 # --- 페이지 1: 홈 화면 ---
+def retry_stats():
+    """통계를 다시 켜면 읽지 못했던 지난 기록을 다시 읽어 봄"""
+    st.session_state.pop('stats_failed', None)
+
 def page_home():
     st.title("📖 100절 암송학교")
     st.write(f"환영합니다, **{st.session_state.nickname}**님! 👋")
+    if st.session_state.get('data_stale'):
+        st.warning("접속이 많아 조금 전에 불러온 데이터를 보여드립니다.")
+
+    # 묶음이 여러 개일 때만 (고른 묶음만 읽음)
+    names = get_decks().names
+    if len(names) > 1:
+        deck = st.selectbox(
+            "말씀 묶음", names, index=names.index(st.session_state.deck), format_func=decks.label,
+        )
+        if deck != st.session_state.deck:
+            switch_deck(deck)
+            st.rerun()
     
     saved_count = len(st.session_state.saved_verses)
     if saved_count > 0:
         st.caption(f"현재 {saved_count}개의 말씀이 저장되어 있습니다.")
+    day = today()
+    due_count = sum(1 for s in st.session_state.review_states.values() if s.due <= day)
+    if due_count > 0:
+        st.caption(f"오늘 복습할 말씀이 {due_count}개 있습니다.")
+
+    # 켰을 때만 통계를 읽음 (첫 조회 때 지난 기록을 한 번 읽고, 이후에는 새 기록만 더함)
+    # 읽지 못했으면 다시 켤 때까지 재실행마다 다시 읽지 않음
+    if st.toggle("📊 암송 통계", key="show_stats", on_change=retry_stats):
+        stats = None if st.session_state.get('stats_failed') else get_attempt_stats()
+        if stats is None:
+            st.session_state.stats_failed = True
+            st.error("암송 기록을 불러오지 못했습니다.")
+        else:
+            progress = stats.progress(st.session_state.nickname)
+            if progress:
+                st.caption(f"지금까지 {progress['attempts']}문제를 풀었고, 정답률은 {progress['accuracy']:.0%} 입니다.")
+            hardest = stats.hardest(st.session_state.deck, limit=5)
+            if hardest:
+                st.markdown("**모두가 어려워하는 말씀**")
+                for verse_id, attempts, rate, seconds in hardest:
+                    verse = verses.get(verse_id)
+                    if verse is not None:
+                        st.write(f"{verse.address} — 오답률 {rate:.0%} ({attempts}회, 평균 {seconds:.0f}초)")
 
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -199,8 +447,12 @@ def page_home():
     
     st.markdown("---")
     if st.button("로그아웃"):
+        with st.spinner("저장하는 중..."):
+            flush_user_data(st.session_state.nickname)
         st.session_state.nickname = ""
-        st.session_state.saved_verses = []
+        st.session_state.user_fields = {}
+        st.session_state.deck_states = {}
+        load_deck_state(st.session_state.deck)
         st.session_state.page = 'login'
         st.rerun()
 
@@ -208,110 +460,94 @@ def page_home():
 def page_study():
     st.header("말씀 학습")
     
-    col_back, col_cat, col_toggle = st.columns([1, 2, 2])
+    col_back, col_cat = st.columns([1, 4])
     with col_back:
         if st.button("🏠 홈"):
             go_home()
     
-    categories = ['전체보기'] + list(df['구분'].unique())
+    categories = [ALL, *verses.categories]
     with col_cat:
-        selected_cat = st.selectbox("구분", categories)
+        selected_cat = st.selectbox("구분", categories, key=f"study_cat_{st.session_state.deck}")
     
-    if selected_cat == '전체보기':
-        filtered_df = df
-    else:
-        filtered_df = df[df['구분'] == selected_cat].reset_index(drop=True)
+    search_verses()
+
+    verse_ids = verses.ids(selected_cat)
     
-    if filtered_df.empty:
+    if not verse_ids:
         st.write("해당하는 말씀이 없습니다.")
         return
 
     # 인덱스 범위 체크
-    if st.session_state.study_idx >= len(filtered_df):
+    if st.session_state.study_idx >= len(verse_ids):
         st.session_state.study_idx = 0
     elif st.session_state.study_idx < 0:
-        st.session_state.study_idx = len(filtered_df) - 1
-
-    # --- 1. 상단 슬라이더 ---
-    current_idx = st.session_state.study_idx + 1
-    new_idx = st.slider(
-        "순서 이동", 
-        1, 
-        len(filtered_df), 
-        current_idx, 
-        label_visibility="collapsed"
-    )
-    if new_idx != current_idx:
-        st.session_state.study_idx = new_idx - 1
-        st.rerun()
-
-    row = filtered_df.iloc[st.session_state.study_idx]
-    
-    with col_toggle:
-        if st.button("🙈 외워보기" if not st.session_state.study_mode_hide else "👁️ 다 보기"):
-            st.session_state.study_mode_hide = not st.session_state.study_mode_hide
-            st.session_state.study_reveal_content = False
-            st.session_state.study_reveal_addr = False
+        st.session_state.study_idx = len(verse_ids) - 1
+
+    # --- 1. 상단 페이지 선택 (페이지 안에서의 이동은 브라우저에서 처리) ---
+    total = len(verse_ids)
+    page_no = st.session_state.study_idx // STUDY_PAGE_SIZE
+    page_count = (total - 1) // STUDY_PAGE_SIZE + 1
+    if page_count > 1:
+        new_page = st.selectbox(
+            "페이지",
+            range(page_count),
+            index=page_no,
+            format_func=lambda p: f"{p * STUDY_PAGE_SIZE + 1} ~ {min((p + 1) * STUDY_PAGE_SIZE, total)}",
+        )
+        if new_page != page_no:
+            st.session_state.study_idx = new_page * STUDY_PAGE_SIZE
             st.rerun()
 
     st.markdown("---")
-    
-    verse_id = int(row['번호'])
-    is_saved = verse_id in st.session_state.saved_verses
-    
-    # 하트 및 내용 영역
-    heart_col1, heart_col2 = st.columns([9, 1])
-    with heart_col2:
-        heart_label = "❤️" if is_saved else "🤍"
-        if st.button(heart_label, key=f"heart_{verse_id}"):
-            toggle_save(verse_id)
-            st.rerun()
-    
-    st.caption(f"No. {verse_id} ({row['구분']})")
-    
-    container = st.container()
-    
-    with container:
-        # 내용
-        if st.session_state.study_mode_hide and not st.session_state.study_reveal_content:
-            if st.button("👆 내용을 보려면 터치하세요", key="reveal_content"):
-                st.session_state.study_reveal_content = True
-                st.rerun()
-        else:
-            st.markdown(f"<div style='text-align: center; font-size: 22px; padding: 20px;'>{row['내용']}</div>", unsafe_allow_html=True)
-            if st.session_state.study_mode_hide:
-                 if st.button("다시 가리기", key="hide_content"):
-                    st.session_state.study_reveal_content = False
-                    st.rerun()
-
-        st.write(" ") 
-
-        # 장절
-        if st.session_state.study_mode_hide and not st.session_state.study_reveal_addr:
-            if st.button("👆 장절을 보려면 터치하세요", key="reveal_addr"):
-                st.session_state.study_reveal_addr = True
-                st.rerun()
-        else:
-            st.markdown(f"<div style='text-align: center; font-size: 18px; color: gray; font-weight: bold;'>{row['장절']}</div>", unsafe_allow_html=True)
-            if st.session_state.study_mode_hide:
-                 if st.button("다시 가리기", key="hide_addr"):
-                    st.session_state.study_reveal_addr = False
-                    st.rerun()
-
-    st.markdown("---")
-    
-    # --- 2. 하단 네비게이션 버튼 (나란히 배치) ---
-    col_prev, col_next = st.columns(2)
-    
-    with col_prev:
-        if st.button("◀ 이전", use_container_width=True):
-            st.session_state.study_idx -= 1
-            st.rerun()
-            
-    with col_next:
-        if st.button("다음 ▶", use_container_width=True):
-            st.session_state.study_idx += 1
-            st.rerun()
+    study_panel(selected_cat, page_no, total)
+
+def jump_to_verse(pos):
+    """검색 결과로 이동: 전체보기의 pos 번째 말씀 (위젯이 그려지기 전에 실행되는 콜백)"""
+    st.session_state[f"study_cat_{st.session_state.deck}"] = ALL
+    st.session_state.study_idx = pos
+    st.session_state.study_jump += 1
+
+def search_verses():
+    with st.expander("🔍 말씀 찾기"):
+        query = st.text_input("검색어 (내용 또는 장절)", key="study_query", placeholder="예: 하나님이 세상을, 요 3:16")
+        if not query.strip():
+            return
+        positions = load_search_index().search(query, limit=SEARCH_LIMIT)
+        if not positions:
+            st.write("찾는 말씀이 없습니다.")
+            return
+        for pos in positions:
+            verse = verses.at(pos)
+            col_text, col_go = st.columns([5, 1])
+            col_text.markdown(f"**{verse.address}** {verse.content}")
+            col_go.button("이동", key=f"search_go_{pos}", on_click=jump_to_verse, args=(pos,))
+
+@st.fragment
+@fragment_rerun("study_panel")
+def study_panel(selected_cat, page_no, total):
+    """말씀 카드 + 이전/다음 (하트와 위치 맞추기 때만 이 부분이 다시 실행됨)"""
+    page_ids = verses.page(selected_cat, page_no, STUDY_PAGE_SIZE)
+    event = study_navigator(
+        [verses.get(vid) for vid in page_ids],
+        start=page_no * STUDY_PAGE_SIZE,
+        total=total,
+        index=st.session_state.study_idx,
+        saved=st.session_state.saved_verses,
+        hide=st.session_state.study_mode_hide,
+        jump=st.session_state.study_jump,
+        key="study_nav",
+    )
+    # 컴포넌트 값은 다음 실행에도 그대로 남아 있으므로 새로 보낸 값만 처리
+    if not event or event['seq'] == st.session_state.study_nav_seq:
+        return
+    st.session_state.study_nav_seq = event['seq']
+    st.session_state.study_idx = event['idx']
+    st.session_state.study_mode_hide = event['hide']
+    if event['heart'] is not None:
+        toggle_save(event['heart'])
+    if event['idx'] // STUDY_PAGE_SIZE != page_no:
+        # 다른 페이지로 넘어가면 페이지 선택과 말씀 목록을 새로 그림
+        st.rerun()
 
 
 # --- 페이지 3: 저장된 말씀 ---
@@ -320,26 +556,32 @@ def page_saved():
     if st.button("🏠 홈으로"):
         go_home()
     
-    if not st.session_state.saved_verses:
+    saved_ids = verses.order(st.session_state.saved_verses)
+    if not saved_ids:
         st.info("저장한 말씀이 없어요")
         return
-
-    saved_df = df[df['번호'].isin(st.session_state.saved_verses)].copy()
-    
-    c1, c2, c3 = st.columns([2, 6, 2])
-    c1.markdown("**장절**")
-    c2.markdown("**말씀**")
-    c3.markdown("**삭제**")
-    st.markdown("---")
+    start, end = list_page("saved_page", len(saved_ids))
     
-    for idx, row in saved_df.iterrows():
+    # 체크만 해 두고 버튼을 누를 때 한 번에 삭제 (누를 때마다 목록을 다시 그리지 않음)
+    with st.form("saved_form", clear_on_submit=True, border=False):
         c1, c2, c3 = st.columns([2, 6, 2])
-        c1.write(row['장절'])
-        c2.write(row['내용'])
-        if c3.button("❤️(삭제)", key=f"del_{row['번호']}"):
-            toggle_save(row['번호'])
-            st.rerun()
+        c1.markdown("**장절**")
+        c2.markdown("**말씀**")
+        c3.markdown("**삭제**")
         st.markdown("---")
+        
+        selected = []
+        for verse in verses.select(saved_ids[start:end]):
+            c1, c2, c3 = st.columns([2, 6, 2])
+            c1.write(verse.address)
+            c2.write(verse.content)
+            if c3.checkbox("❤️(삭제)", key=f"del_{verse.id}"):
+                selected.append(verse.id)
+            st.markdown("---")
+
+        if st.form_submit_button("선택한 말씀 삭제", use_container_width=True):
+            update_saved(remove=selected)
+            st.rerun()
 
 
 # --- 페이지 4: 말씀 암송 ---
@@ -348,42 +590,120 @@ def finish_test():
     st.session_state.page = 'test_result'
     st.rerun()
 
+def rerun_quiz():
+    """문제 영역(fragment)만 다시 실행 (전체 실행 중이면 전체를 다시 실행)"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # 문제 영역이 전체 실행 안에서 그려졌을 때 (fragment 재실행이 전체 재실행에 합쳐진 경우, AppTest)
+        st.rerun()
+
+def record_review(verse_id, quality):
+    """복습 일정 갱신 (저장은 백그라운드)"""
+    scheduler = st.session_state.test_scheduler
+    scheduler.review(verse_id, quality, today())
+    save_review_states(st.session_state.nickname, scheduler.states)
+
+def record_attempt(verse_id, correct, seconds=None):
+    """암송 기록 한 줄 (저장은 백그라운드, 통계에는 바로 반영)"""
+    now = time.time()
+    if seconds is None:
+        seconds = now - st.session_state.test_question_started
+    attempt = (
+        now,
+        st.session_state.nickname,
+        verse_id,
+        int(correct),
+        st.session_state.test_hint_level,
+        round(seconds, 1),
+        st.session_state.deck,
+    )
+    # 통계는 불러와 있을 때만 로그가 더해 줌 (지난 기록은 통계를 켤 때만 읽음)
+    log = get_attempt_log()
+    if log:
+        log.add(attempt)
+
 def next_question():
     """다음 문제로 이동하며 힌트 레벨 초기화"""
     st.session_state.test_current_idx += 1
-    if st.session_state.test_current_idx < len(df):
+    next_id = None
+    if st.session_state.test_current_idx < st.session_state.test_count:
+        next_id = st.session_state.test_scheduler.take(today())
+    if next_id is not None:
+        st.session_state.test_verse_id = next_id
         st.session_state.test_hint_level = 3
         st.session_state.test_status = 'input'
         st.session_state.input_key_suffix += 1
+        st.session_state.test_question_started = time.time()
     else:
         finish_test()
-    st.rerun()
-
-def init_test():
+    rerun_quiz()
+
+def init_test(start=0, count=None, batch=False):
+    st.session_state.test_start = start
+    st.session_state.test_count = len(verses) - start if count is None else count
+    # 복습할 때가 된 말씀부터, 그다음 새 말씀 순서로 출제
+    order = verses.ids(ALL)[start:start + st.session_state.test_count]
+    scheduler = Scheduler(st.session_state.review_states, order)
+    st.session_state.test_scheduler = scheduler
+    # 한 번에 풀기는 next_batch 가 문제를 고름
+    st.session_state.test_verse_id = None if batch else scheduler.take(today())
     st.session_state.test_current_idx = 0
     st.session_state.test_score = 0
-    st.session_state.test_answers = [] 
+    st.session_state.test_answers = array('I') 
     st.session_state.test_hint_level = 3
     st.session_state.test_status = 'input'
     st.session_state.input_key_suffix = 0 
     st.session_state.test_user_content = ""
     st.session_state.test_user_addr = ""
-    st.session_state.page = 'test'
+    st.session_state.test_flash = False
+    st.session_state.test_question_started = time.time()
+    st.session_state.test_batch_ids = array('I')
+    st.session_state.test_batch_wrong = {}
+    st.session_state.page = 'test_batch' if batch else 'test'
 
 def page_test_prep():
-    init_test()
-    st.rerun()
+    total = len(verses)
+
+    st.header("말씀 암송")
+    if st.button("🏠 홈으로"):
+        go_home()
+
+    # 한 번에 풀기: BATCH_SIZE 문제를 모두 쓰고 한 번에 채점 (힌트 없음)
+    mode = st.radio("방식", ["한 문제씩", f"{BATCH_SIZE}문제씩 한 번에"], horizontal=True)
+
+    # 말씀이 많으면 한 번에 TEST_PAGE_SIZE 절씩 범위를 골라 암송
+    page_no = 0
+    if total > TEST_PAGE_SIZE:
+        page_count = (total - 1) // TEST_PAGE_SIZE + 1
+        page_no = st.selectbox(
+            "범위 선택",
+            range(page_count),
+            format_func=lambda p: f"{p * TEST_PAGE_SIZE + 1} ~ {min((p + 1) * TEST_PAGE_SIZE, total)}",
+        )
+    if st.button("시작하기"):
+        start = page_no * TEST_PAGE_SIZE
+        init_test(start, min(TEST_PAGE_SIZE, total - start), batch=mode != "한 문제씩")
+        st.rerun()
 
 def page_test():
-    if st.session_state.test_current_idx >= len(df):
+    if st.session_state.test_current_idx >= st.session_state.test_count or st.session_state.test_verse_id is None:
         finish_test() 
         return
+    quiz()
 
-    row = df.iloc[st.session_state.test_current_idx]
-    verse_num = row['번호']
+@st.fragment
+@fragment_rerun("quiz")
+def quiz():
+    """문제 영역: 힌트/완료/다음을 눌러도 이 부분만 다시 실행됨"""
+    row = verses.get(st.session_state.test_verse_id)
+
+    if st.session_state.test_flash:
+        st.markdown("<div class='correct correct-flash'>⭕ 정답입니다!</div>", unsafe_allow_html=True)
+        st.session_state.test_flash = False
     
     c1, c2, c3 = st.columns([2, 6, 2])
-    c1.subheader(f"{verse_num} / 100")
+    c1.subheader(f"{st.session_state.test_current_idx + 1} / {st.session_state.test_count}")
     
     with c2:
         hint_label = f"힌트 ({st.session_state.test_hint_level})"
@@ -393,17 +713,15 @@ def page_test():
         if st.session_state.test_status == 'input':
             if st.button(hint_label):
                 if st.session_state.test_hint_level == 0:
-                    st.session_state.test_answers.append({
-                        '번호': row['번호'],
-                        '장절': row['장절'],
-                        '내용': row['내용']
-                    })
+                    st.session_state.test_answers.append(row.id)
+                    record_review(row.id, QUALITY_REVEALED)
+                    record_attempt(row.id, False)
                     st.session_state.test_user_addr = "" 
                     st.session_state.test_user_content = ""
                     st.session_state.test_status = 'wrong'
                 else:
                     st.session_state.test_hint_level -= 1
-                st.rerun()
+                rerun_quiz()
     
     with c3:
         if st.button("끝"):
@@ -415,21 +733,17 @@ def page_test():
 
     st.markdown("---")
 
-    real_content = row['내용']
-    real_addr = row['장절']
+    real_content = row.content
+    real_addr = row.address
     
-    try:
-        base_addr = real_addr.split(':')[0]
-    except:
-        base_addr = real_addr 
-    st.info(f"📖 문제 범위: **{base_addr}**")
+    st.info(f"📖 문제 범위: **{row.chapter_label}**")
 
     addr_hint_msg = ""
     content_hint_msgs = []
     
     # 힌트 2 (첫 단어)
     if st.session_state.test_hint_level <= 2:
-        first_word = real_content.split()[0]
+        first_word = row.first_word
         content_hint_msgs.append(f"💡 첫 단어: **{first_word}**...")
     
     # 힌트 1 (장절)
@@ -438,7 +752,7 @@ def page_test():
 
     # 힌트 0 (마지막 단어)
     if st.session_state.test_hint_level == 0:
-        last_word = real_content.split()[-1]
+        last_word = row.last_word
         content_hint_msgs.append(f"💡 마지막 단어: ...**{last_word}**")
 
     placeholder = st.empty()
@@ -454,6 +768,7 @@ def page_test():
                 st.info(addr_hint_msg)
             
             u_addr = st.text_input("장절 입력", key=input_addr_key, label_visibility="collapsed")
+            book_name_completion()
             
             st.write(" ") 
 
@@ -466,67 +781,156 @@ def page_test():
             if st.button("완료"):
                 check_answer(u_addr, u_content, real_addr, real_content, row)
                 
-        elif st.session_state.test_status == 'correct':
-            st.markdown("""<div class='correct'>⭕ 정답입니다!</div>""", unsafe_allow_html=True)
-            time.sleep(1) 
-            next_question()
-            
         elif st.session_state.test_status == 'wrong':
-            st.error("틀린 부분이 있습니다. (정답 확인)")
-            
-            clean_u_addr = st.session_state.test_user_addr.strip().replace(" ", "")
-            clean_r_addr = real_addr.strip().replace(" ", "")
-            
-            if clean_u_addr != clean_r_addr:
-                if st.session_state.test_user_addr == "":
-                     st.markdown(f"**내가 쓴 장절:** (입력 없음)", unsafe_allow_html=True)
-                else:
-                    st.markdown(f"**내가 쓴 장절:** <span style='color:red'>{st.session_state.test_user_addr}</span>", unsafe_allow_html=True)
-                st.info(f"정답: {real_addr}")
-            else:
-                st.markdown(f"**장절:** {real_addr} (정답)")
-            
-            st.markdown("---")
-            
-            clean_u_content = st.session_state.test_user_content.strip() 
-            diff_html = diff_strings(clean_u_content, real_content)
-            
-            st.markdown("**내가 쓴 내용 (틀린 부분 빨간색):**", unsafe_allow_html=True)
-            if clean_u_content == "":
-                st.write("(입력 없음)")
-            else:
-                st.markdown(f"<div style='background-color:#f0f0f0; padding:10px; border-radius:5px;'>{diff_html}</div>", unsafe_allow_html=True)
-            
-            st.info(f"**정답:**\n{real_content}")
+            show_feedback(st.session_state.test_user_addr, st.session_state.test_user_content, real_addr, real_content)
 
             if st.button("다음"):
                 next_question()
 
-def check_answer(u_addr, u_content, r_addr, r_content, row_data):
-    clean_u_addr = u_addr.strip().replace(" ", "")
-    clean_r_addr = r_addr.strip().replace(" ", "")
+def show_feedback(u_addr, u_content, real_addr, real_content, addr_correct=None):
+    """틀린 문제의 장절/내용 비교 (한 문제씩, 한 번에 풀기 공통)"""
+    st.error("틀린 부분이 있습니다. (정답 확인)")
     
-    addr_correct = clean_u_addr == clean_r_addr
-
-    if u_content.strip() == "":
-        correct_words = r_content.split(' ')
-        diff_html = ' '.join(["<span class='diff-red'>˅</span>"] * len(correct_words))
+    if addr_correct is None:
+        addr_correct = addresses_match(u_addr, real_addr)
+    if not addr_correct:
+        if u_addr == "":
+             st.markdown(f"**내가 쓴 장절:** (입력 없음)", unsafe_allow_html=True)
+        else:
+            st.markdown(f"**내가 쓴 장절:** <span style='color:red'>{u_addr}</span>", unsafe_allow_html=True)
+        st.info(f"정답: {real_addr}")
     else:
-        diff_html = diff_strings(u_content, r_content)  # ✅ 수정된 함수 사용
+        st.markdown(f"**장절:** {real_addr} (정답)")
+    
+    st.markdown("---")
+    
+    clean_u_content = u_content.strip() 
+    diff_html = diff_strings(clean_u_content, real_content)
+    
+    st.markdown("**내가 쓴 내용 (틀린 부분 빨간색):**", unsafe_allow_html=True)
+    if clean_u_content == "":
+        st.write("(입력 없음)")
+    else:
+        st.markdown(f"<div style='background-color:#f0f0f0; padding:10px; border-radius:5px;'>{diff_html}</div>", unsafe_allow_html=True)
+    
+    st.info(f"**정답:**\n{real_content}")
 
-    if addr_correct and u_content.strip() == r_content.strip():
+def check_answer(u_addr, u_content, r_addr, r_content, row_data):
+    # 한 번에 풀기와 같은 채점: "창 1:26", "Gen 1:26" 도 "창세기 1:26" 과 같은 장절,
+    # 내용은 문장 부호와 여러 칸 공백만 무시 (띄어쓰기 위치는 그대로 채점)
+    addr_correct, content_correct = grade_batch([(u_addr, u_content, r_addr, r_content)])[0]
+
+    is_correct = addr_correct and content_correct
+    record_review(row_data.id, quality_for(is_correct, st.session_state.test_hint_level))
+    record_attempt(row_data.id, is_correct)
+
+    if is_correct:
         st.session_state.test_score += 1
-        st.session_state.test_status = 'correct'
-        st.rerun()
+        # 정답 표시는 다음 문제 위에 잠깐 보여주고 바로 넘어감
+        st.session_state.test_flash = True
+        next_question()
     else:
-        st.session_state.test_answers.append({
-            '번호': row_data['번호'],
-            '장절': row_data['장절'],
-            '내용': row_data['내용']
-        })
+        st.session_state.test_answers.append(row_data.id)
         st.session_state.test_user_addr = u_addr
         st.session_state.test_user_content = u_content
         st.session_state.test_status = 'wrong'
+        rerun_quiz()
+
+# --- 페이지 4-2: 한 번에 풀기 ---
+def next_batch():
+    """다음 BATCH_SIZE 문제 (복습 순서대로). 남은 문제가 없으면 결과 페이지로"""
+    scheduler = st.session_state.test_scheduler
+    remaining = st.session_state.test_count - st.session_state.test_current_idx
+    ids = array('I')
+    while len(ids) < min(BATCH_SIZE, remaining):
+        verse_id = scheduler.take(today())
+        if verse_id is None:
+            break
+        ids.append(verse_id)
+    if not ids:
+        finish_test()
+    st.session_state.test_batch_ids = ids
+    st.session_state.test_batch_wrong = {}
+    st.session_state.test_status = 'input'
+    st.session_state.input_key_suffix += 1
+    st.session_state.test_question_started = time.time()
+
+def grade_page(ids, answers):
+    """한 페이지의 답을 한 번에 채점하고 복습 일정/암송 기록/점수를 반영"""
+    rows = [verses.get(vid) for vid in ids]
+    results = grade_batch([(a, c, row.address, row.content) for (a, c), row in zip(answers, rows)])
+    seconds = (time.time() - st.session_state.test_question_started) / len(ids)
+
+    scheduler = st.session_state.test_scheduler
+    wrong = {}
+    for row, (u_addr, u_content), (addr_ok, content_ok) in zip(rows, answers, results):
+        is_correct = addr_ok and content_ok
+        scheduler.review(row.id, quality_for(is_correct, st.session_state.test_hint_level), today())
+        record_attempt(row.id, is_correct, seconds)
+        if is_correct:
+            st.session_state.test_score += 1
+        else:
+            st.session_state.test_answers.append(row.id)
+            wrong[row.id] = (u_addr, u_content, addr_ok)
+    # 복습 일정은 페이지마다 한 번만 저장
+    save_review_states(st.session_state.nickname, scheduler.states)
+
+    st.session_state.test_current_idx += len(ids)
+    st.session_state.test_batch_wrong = wrong
+    st.session_state.test_status = 'graded'
+
+def page_test_batch():
+    if not st.session_state.test_batch_ids:
+        next_batch()
+    ids = st.session_state.test_batch_ids
+    done = st.session_state.test_current_idx
+    suffix = st.session_state.input_key_suffix
+
+    c1, c2 = st.columns([8, 2])
+    if st.session_state.test_status == 'graded':
+        c1.subheader(f"{done} / {st.session_state.test_count}")
+    else:
+        c1.subheader(f"{done + 1} ~ {done + len(ids)} / {st.session_state.test_count}")
+    if c2.button("끝"):
+        finish_test()
+    st.markdown("---")
+
+    if st.session_state.test_status == 'input':
+        # 입력하는 동안에는 다시 실행되지 않고, '채점하기' 때 한 번에 전송
+        with st.form(f"batch_form_{suffix}", border=False):
+            for n, vid in enumerate(ids, start=done + 1):
+                row = verses.get(vid)
+                st.info(f"{n}. 📖 문제 범위: **{row.chapter_label}**")
+                st.text_input("장절 입력", key=f"batch_addr_{suffix}_{vid}", placeholder="장절 (예: 창세기 1:26)")
+                st.text_area("내용 입력", height=100, key=f"batch_content_{suffix}_{vid}", label_visibility="collapsed")
+                st.markdown("---")
+            submitted = st.form_submit_button("채점하기", use_container_width=True)
+        if submitted:
+            answers = [
+                (st.session_state[f"batch_addr_{suffix}_{vid}"], st.session_state[f"batch_content_{suffix}_{vid}"])
+                for vid in ids
+            ]
+            grade_page(ids, answers)
+            st.rerun()
+        return
+
+    wrong = st.session_state.test_batch_wrong
+    right = len(ids) - len(wrong)
+    st.markdown(f"<div class='correct'>⭕ {right} / {len(ids)} 정답</div>", unsafe_allow_html=True)
+    for vid in ids:
+        if vid not in wrong:
+            continue
+        row = verses.get(vid)
+        u_addr, u_content, addr_ok = wrong[vid]
+        st.markdown(f"#### {row.chapter_label}")
+        show_feedback(u_addr, u_content, row.address, row.content, addr_correct=addr_ok)
+        st.markdown("---")
+
+    if st.session_state.test_current_idx >= st.session_state.test_count:
+        if st.button("결과 보기"):
+            finish_test()
+    elif st.button("다음"):
+        next_batch()
         st.rerun()
 
 # --- 페이지 5: 암송 결과 ---
@@ -547,45 +951,53 @@ def page_test_result():
         st.success("오답이 없어요! 💯")
     else:
         st.markdown("### 틀린 문제")
-        c1, c2, c3 = st.columns([3, 6, 1])
-        c1.markdown("**장절**")
-        c2.markdown("**말씀**")
-        c3.markdown("**저장**")
-        st.markdown("---")
-        
-        for item in st.session_state.test_answers:
+        answers = st.session_state.test_answers
+        start, end = list_page("result_page", len(answers))
+        saved = st.session_state.saved_verses
+
+        # 하트는 체크만 해 두고 '저장 반영' 때 한 번에 저장
+        with st.form("result_form", border=False):
             c1, c2, c3 = st.columns([3, 6, 1])
-            c1.write(item['장절'])
-            c2.write(item['내용'])
-            
-            verse_id = int(item['번호'])
-            is_saved = verse_id in st.session_state.saved_verses
-            heart_icon = "❤️" if is_saved else "🤍"
+            c1.markdown("**장절**")
+            c2.markdown("**말씀**")
+            c3.markdown("**저장**")
+            st.markdown("---")
             
-            if c3.button(heart_icon, key=f"result_save_{verse_id}"):
-                toggle_save(verse_id)
-                st.rerun()
+            choices = {}
+            for verse_id in answers[start:end]:
+                verse = verses.get(verse_id)
+                c1, c2, c3 = st.columns([3, 6, 1])
+                c1.write(verse.address)
+                c2.write(verse.content)
                 
-            st.markdown("---")
+                choices[verse_id] = c3.checkbox(
+                    "❤️", value=verse_id in saved, key=f"result_save_{verse_id}", label_visibility="collapsed"
+                )
+                st.markdown("---")
+
+            if st.form_submit_button("❤️ 저장 반영", use_container_width=True):
+                update_saved(
+                    add=[vid for vid, on in choices.items() if on],
+                    remove=[vid for vid, on in choices.items() if not on],
+                )
+                st.rerun()
 
     if st.button("홈으로 돌아가기"):
         go_home()
 
 
-if st.session_state.page == 'login':
-    page_login()
-elif st.session_state.page == 'home':
-    page_home()
-elif st.session_state.page == 'study':
-    page_study()
-elif st.session_state.page == 'saved':
-    page_saved()
-elif st.session_state.page == 'test_prep':
-    page_test_prep()
-elif st.session_state.page == 'test':
-    page_test()
-elif st.session_state.page == 'test_result':
-    page_test_result()
-
-
+PAGES = {
+    'login': page_login,
+    'home': page_home,
+    'study': page_study,
+    'saved': page_saved,
+    'test_prep': page_test_prep,
+    'test': page_test,
+    'test_batch': page_test_batch,
+    'test_result': page_test_result,
+}
 
+page = st.session_state.page
+if page in PAGES:
+    with METRICS.rerun(st.session_state.session_id, page):
+        PAGES[page]()
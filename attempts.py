@@ -0,0 +1,238 @@
+"""암송 기록과 말씀별/사용자별 집계
+
+한 문제를 풀 때마다 (시각, 닉네임, 말씀 번호, 정답 여부, 힌트 단계, 걸린 초, 말씀 묶음) 한 줄을 남긴다.
+- AttemptLog: 기록을 모아 두었다가 백그라운드에서 append_attempts 한 번으로 덧붙임.
+  통계를 처음 불러올 때(load_stats) 아직 저장하지 않은 기록을 넘겨주고, 이후 기록은 바로 더함
+- AttemptStats: 말씀별 오답률과 사용자별 진행도. 새 기록은 모아 두었다가 조회할 때
+  (또는 max_pending 개가 차면) 그 묶음만 pandas 로 집계해서 기존 합계에 더하므로,
+  지난 기록을 다시 훑지 않는다.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from storage import ATTEMPT_FIELDS
+from write_behind import RetryingWriter
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5.0
+MAX_BATCH = 500
+MAX_RETRIES = 5
+BACKOFF = 0.5
+MAX_PENDING = 1000   # 통계에 아직 더하지 않은 기록이 이만큼 차면 바로 집계
+
+
+class AttemptLog(RetryingWriter):
+    """기록을 모아 flush_interval 마다 (또는 max_batch 개가 차면) append_attempts(기록 목록) 로 저장"""
+    _label = "암송 기록 저장"
+    _unit = "줄"
+    _logger = logger
+
+    def __init__(self, append_attempts, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF):
+        self._append = append_attempts
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._max_retries = max_retries
+        self._backoff = backoff
+
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._stats = None
+        self._paused = 0     # 지난 기록을 읽는 중이면 저장하지 않음
+        self._inflight = 0
+        self._flush_now = False
+        self._closed = False
+
+        self.added = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failures = 0
+
+        self._thread = threading.Thread(target=self._run, name="attempt-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, attempt):
+        with self._cond:
+            self._buffer.append(attempt)
+            self.added += 1
+            if self._stats is not None:
+                self._stats.add([attempt])
+            # 첫 기록이면 워커가 flush_interval 을 세기 시작하도록, 가득 찼으면 바로 저장하도록 깨움
+            if len(self._buffer) == 1 or len(self._buffer) >= self._max_batch:
+                self._cond.notify_all()
+
+    def load_stats(self, load):
+        """load() 로 지난 기록의 통계를 만들어, 아직 저장하지 않은 기록을 더하고 이후 기록도 바로 더함
+
+        읽는 동안은 저장을 멈추므로 (진행 중인 저장은 끝날 때까지 기다림) 버퍼에 남은 기록이
+        곧 지난 기록에 들어가지 않은 기록이다. 시각을 비교하지 않으므로 다른 프로세스의 기록과 섞이지 않는다.
+        """
+        with self._cond:
+            self._paused += 1
+            while self._inflight:
+                self._cond.wait()
+        stats = None
+        try:
+            stats = load()
+        finally:
+            with self._cond:
+                self._paused -= 1
+                if stats is not None:
+                    stats.add(list(self._buffer))
+                    self._stats = stats
+                self._cond.notify_all()
+        return stats
+
+    def flush(self, timeout=10):
+        """모아 둔 기록을 바로 저장하고 끝날 때까지 기다림"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_now = True
+            self._cond.notify_all()
+            while self._buffer or self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout=10):
+        """남은 기록을 모두 저장하고 워커 종료"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'buffered': len(self._buffer),
+                'added': self.added,
+                'written': self.written,
+                'batches': self.batches,
+                'retries': self.retries,
+                'failures': self.failures,
+            }
+
+    # --- 워커 ---
+    def _next_batch(self):
+        """저장할 기록을 꺼냄. 종료되고 남은 것이 없으면 None"""
+        with self._cond:
+            deadline = time.monotonic() + self._flush_interval
+            while True:
+                full = len(self._buffer) >= self._max_batch
+                ready = full or self._flush_now or time.monotonic() >= deadline
+                if self._buffer and (self._closed or (ready and not self._paused)):
+                    batch = self._buffer[:self._max_batch]
+                    del self._buffer[:self._max_batch]
+                    self._inflight = len(batch)
+                    if not self._buffer:
+                        self._flush_now = False
+                    return batch
+                if self._closed:
+                    return None
+                if not self._buffer:
+                    self._flush_now = False
+                    self._cond.wait()
+                    deadline = time.monotonic() + self._flush_interval
+                elif self._paused:
+                    self._cond.wait()
+                else:
+                    self._cond.wait(max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            ok = self._write_with_retry(self._append, batch)
+            with self._cond:
+                self._inflight = 0
+                if ok:
+                    self.written += len(batch)
+                elif not self._closed:
+                    # 실패한 기록은 앞에 다시 넣어 다음 주기에 저장 (순서 유지)
+                    self._buffer[:0] = batch
+                self._cond.notify_all()
+
+
+class AttemptStats:
+    """말씀별 오답률과 사용자별 진행도 (누적 합계 + 아직 더하지 않은 새 기록)"""
+
+    def __init__(self, attempts=(), max_pending=MAX_PENDING):
+        self._lock = threading.Lock()
+        self._new = list(attempts)
+        self._max_pending = max_pending
+        self._per_verse = None   # (묶음, 말씀 번호) → attempts, wrong, seconds
+        self._per_user = None    # 닉네임 → attempts, correct, seconds, last
+        self._hardest = {}       # (deck, limit, min_attempts) → 결과 (새 기록이 더해지면 비움)
+
+    def add(self, attempts):
+        with self._lock:
+            self._new.extend(attempts)
+            if len(self._new) >= self._max_pending:
+                self._fold()
+
+    def _fold(self):
+        """새 기록만 집계해서 합계에 더함 (self._lock 안에서 호출)"""
+        if not self._new:
+            return
+        import pandas as pd  # 통계를 볼 때만 필요
+
+        df = pd.DataFrame.from_records(self._new, columns=ATTEMPT_FIELDS)
+        self._new = []
+        df['Wrong'] = 1 - df['Correct']
+        verse = df.groupby(['Deck', 'Verse']).agg(attempts=('Correct', 'size'), wrong=('Wrong', 'sum'), seconds=('Seconds', 'sum'))
+        user = df.groupby('Nickname').agg(
+            attempts=('Correct', 'size'), correct=('Correct', 'sum'), seconds=('Seconds', 'sum'), last=('Time', 'max'))
+
+        if self._per_verse is None:
+            self._per_verse = verse
+        else:
+            self._per_verse = self._per_verse.add(verse, fill_value=0)
+        if self._per_user is None:
+            self._per_user = user
+        else:
+            last = pd.concat([self._per_user['last'], user['last']]).groupby(level=0).max()
+            self._per_user = self._per_user.drop(columns='last').add(user.drop(columns='last'), fill_value=0)
+            self._per_user['last'] = last
+        self._hardest = {}
+
+    def hardest(self, deck='', limit=10, min_attempts=3):
+        """묶음에서 오답률이 높은 말씀 [(번호, 시도 수, 오답률, 평균 초)] (같으면 시도가 많은 말씀 먼저)"""
+        with self._lock:
+            self._fold()
+            key = (deck, limit, min_attempts)
+            if key not in self._hardest:
+                result = []
+                if self._per_verse is not None and deck in self._per_verse.index.get_level_values('Deck'):
+                    v = self._per_verse.xs(deck, level='Deck')
+                    v = v[v['attempts'] >= min_attempts]
+                    v = v.assign(rate=v['wrong'] / v['attempts'], avg=v['seconds'] / v['attempts'])
+                    v = v.sort_values(['rate', 'attempts'], ascending=[False, False]).head(limit)
+                    result = [(int(i), int(r.attempts), float(r.rate), float(r.avg)) for i, r in v.iterrows()]
+                self._hardest[key] = result
+            return self._hardest[key]
+
+    def progress(self, nickname):
+        """{'attempts', 'correct', 'accuracy', 'seconds', 'last'} (기록이 없으면 None)"""
+        with self._lock:
+            self._fold()
+            if self._per_user is None or nickname not in self._per_user.index:
+                return None
+            row = self._per_user.loc[nickname]
+            attempts = int(row['attempts'])
+            return {
+                'attempts': attempts,
+                'correct': int(row['correct']),
+                'accuracy': float(row['correct']) / attempts,
+                'seconds': float(row['seconds']),
+                'last': float(row['last']),
+            }
@@ -0,0 +1,75 @@
+"""diff_strings 마이크로 벤치마크: 기존 탐욕 비교 vs 단어 정렬 엔진
+
+    python benchmarks/bench_diff.py [반복 횟수]
+"""
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import VerseIndex  # noqa: E402
+from grading import correct_tokens, diff_strings  # noqa: E402
+
+
+def legacy_diff_strings(user_input, correct_text):
+    """이전 버전 (정답 단어를 차례로 보며 사용자 단어와 같은지만 확인)"""
+    user_words = user_input.split(' ')
+    correct_words = correct_text.split(' ')
+    output_parts = []
+    user_idx = 0
+    for correct_word in correct_words:
+        if user_idx < len(user_words) and user_words[user_idx] == correct_word:
+            output_parts.append(correct_word)
+            user_idx += 1
+        else:
+            output_parts.append("<span class='diff-red'>˅</span>")
+    return ' '.join(output_parts)
+
+
+def perturb(text, rng):
+    """한 단어를 빼거나, 더하거나, 한 글자를 바꿈"""
+    words = text.split()
+    i = rng.randrange(len(words))
+    kind = rng.choice(('drop', 'add', 'typo'))
+    if kind == 'drop' and len(words) > 1:
+        del words[i]
+    elif kind == 'add':
+        words.insert(i, '그리고')
+    else:
+        w = words[i]
+        words[i] = w[:-1] + ('을' if w[-1] != '을' else '를')
+    return ' '.join(words)
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(0)
+    index = VerseIndex(os.path.join(ROOT, "bible_verses_clean.csv"))
+    texts = [index.at(p).content for p in range(len(index))]
+    long_text = ' '.join(texts[:20])
+
+    cases = {
+        'exact': [(t, t) for t in texts],
+        'one-edit': [(perturb(t, rng), t) for t in texts],
+        'empty': [('', t) for t in texts],
+        'long (20 verses)': [(perturb(long_text, rng), long_text)] * 10,
+    }
+
+    print(f"{'case':<18}{'legacy us':>12}{'aligned us':>12}{'cold us':>12}")
+    for name, pairs in cases.items():
+        results = []
+        for fn in (legacy_diff_strings, diff_strings):
+            t = timeit.timeit(lambda: [fn(u, c) for u, c in pairs], number=number)
+            results.append(t / number / len(pairs) * 1e6)
+        # 정답 토큰 캐시가 비어 있을 때
+        correct_tokens.cache_clear()
+        t = timeit.timeit(lambda: [diff_strings(u, c) for u, c in pairs], number=1)
+        results.append(t / len(pairs) * 1e6)
+        print(f"{name:<18}" + ''.join(f"{r:>12.1f}" for r in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""복습 일정 시뮬레이션 벤치마크 (결정적)
+
+사용자 N명이 말씀 V절을 D일 동안 하루 Q문제씩 암송한다고 가정하고
+next_verse / review 시간과 저장 문자열 크기를 잰다.
+
+    python benchmarks/bench_scheduler.py [사용자 수] [말씀 수] [일 수] [하루 문제 수]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scheduler import Scheduler, decode_states, encode_states, quality_for  # noqa: E402
+
+
+def simulate(users, verse_count, days, per_day, seed=0):
+    rng = random.Random(seed)
+    order = list(range(1, verse_count + 1))
+    start_day = 738000
+    all_states = [{} for _ in range(users)]
+    # 사용자마다 실력이 다름
+    skill = [rng.uniform(0.4, 0.95) for _ in range(users)]
+
+    next_time = review_time = 0.0
+    ops = 0
+    for day in range(start_day, start_day + days):
+        for u in range(users):
+            states = all_states[u]
+            scheduler = Scheduler(states, order)
+            for _ in range(per_day):
+                t0 = time.perf_counter()
+                vid = scheduler.take(day)
+                t1 = time.perf_counter()
+                if vid is None:
+                    break
+                state = states.get(vid)
+                # 여러 번 맞힌 말씀일수록 잘 기억함
+                p = min(0.99, skill[u] + 0.1 * (state.reps if state else 0))
+                correct = rng.random() < p
+                scheduler.review(vid, quality_for(correct, rng.randint(0, 3)), day)
+                t2 = time.perf_counter()
+                next_time += t1 - t0
+                review_time += t2 - t1
+                ops += 1
+
+    encoded = [encode_states(s) for s in all_states]
+    t0 = time.perf_counter()
+    for text in encoded:
+        decode_states(text)
+    decode_time = time.perf_counter() - t0
+    sizes = sorted(len(e) for e in encoded)
+    checksum = sum(s.due * vid for states in all_states for vid, s in states.items())
+    return {
+        'ops': ops,
+        'next_verse_us': next_time / ops * 1e6,
+        'review_us': review_time / ops * 1e6,
+        'decode_us_per_user': decode_time / users * 1e6,
+        'state_bytes_avg': sum(sizes) / users,
+        'state_bytes_max': sizes[-1],
+        'checksum': checksum,
+    }
+
+
+def main():
+    args = [int(a) for a in sys.argv[1:]]
+    users, verse_count, days, per_day = (args + [10000, 100, 7, 10][len(args):])[:4]
+    t0 = time.perf_counter()
+    result = simulate(users, verse_count, days, per_day)
+    elapsed = time.perf_counter() - t0
+    print(f"{users} users x {verse_count} verses, {days} days x {per_day}/day ({elapsed:.1f}s)")
+    for key, value in result.items():
+        print(f"  {key:<20}{value:>14.2f}" if isinstance(value, float) else f"  {key:<20}{value:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""말씀 검색 벤치마크: 색인 만드는 시간과 검색어 하나당 시간
+
+말씀 파일을 배수만큼 이어 붙인 것처럼 색인을 만들고 (배수 300 이면 성경 전체와 비슷한 3만 절),
+말씀에서 뽑은 두 단어 검색어와 자주 쓰는 검색어로 search() 시간을 잰다.
+p99 가 예산을 넘으면 실패(종료 코드 1)로 끝난다.
+
+    python benchmarks/bench_search.py [말씀 파일] [배수] [예산(ms)]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import VerseIndex  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+COPIES = 300
+QUERIES = 2000
+BUDGET_MS = 1.0
+COMMON = ('하나님', '사랑', '여호와', '예수 그리스도', '하나님 여호와', '믿음으로', '창세기 1장', '요 3:16',
+          '사랑ㅎ하사', '없는 말')
+
+
+class Repeated:
+    """같은 말씀 목록을 copies 번 이어 붙인 것처럼 보이게 함"""
+
+    def __init__(self, corpus, copies):
+        self._corpus = corpus
+        self._copies = copies
+
+    def __len__(self):
+        return len(self._corpus) * self._copies
+
+    def at(self, pos):
+        return self._corpus.at(pos % len(self._corpus))
+
+
+def main():
+    args = sys.argv[1:]
+    path = args[0] if len(args) > 0 else os.path.join(ROOT, "bible_verses_clean.csv")
+    copies = int(args[1]) if len(args) > 1 else COPIES
+    budget = float(args[2]) if len(args) > 2 else BUDGET_MS
+
+    corpus = Repeated(VerseIndex(path), copies)
+    t0 = time.perf_counter()
+    index = SearchIndex(corpus)
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"  말씀 {len(index)}절, 색인 {build_ms:.0f}ms")
+
+    rng = random.Random(0)
+    queries = list(COMMON)
+    while len(queries) < QUERIES:
+        words = corpus.at(rng.randrange(len(corpus))).content.split()
+        i = rng.randrange(max(1, len(words) - 1))
+        queries.append(' '.join(words[i:i + 2]))
+
+    times = []
+    for query in queries:
+        t0 = time.perf_counter()
+        index.search(query, limit=10)
+        times.append(((time.perf_counter() - t0) * 1000, query))
+    times.sort()
+    ms = [t for t, _ in times]
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(f"  검색 {len(ms)}회   median {statistics.median(ms):.3f}ms   p99 {p99:.3f}ms   "
+          f"max {times[-1][0]:.3f}ms ({times[-1][1]})")
+
+    if p99 > budget:
+        print(f"FAIL 검색 p99 {p99:.3f}ms > 예산 {budget}ms")
+        return 1
+    print(f"OK (예산 {budget}ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
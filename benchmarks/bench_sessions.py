@@ -0,0 +1,345 @@
+"""여러 세션이 앱 전체를 끝까지 사용하는 부하 벤치마크 (Streamlit AppTest + 가짜 저장소)
+
+세션마다 로그인 → 통계 보기 → 말씀 학습에서 이동 → 암송 한 회 → 결과 화면에서 하트 저장 → 로그아웃
+을 하고
+- 동작별 재실행 시간 (p50 / p90 / p99 / 최대)
+- 동작별 저장소 읽기 수와 저장 요청 수, 실제로 저장소에 쓴 묶음/사용자 수
+- 요청 조절(QuotaUserStore) 수치: 합쳐진 읽기, 토큰 대기, 사용량 오류 재시도
+- 최대 메모리 (최대 RSS)
+를 출력한다. 세션마다 스레드 하나로 동시에 실행하고, 저장소와 캐시를 함께 쓴다.
+가짜 저장소는 시트처럼 호출마다 LATENCY 초가 걸리고 ERROR_RATE 비율로 사용량 오류(429)를 내며,
+운영과 같이 QuotaUserStore 를 씌워 쓴다.
+
+학습 화면의 이동은 브라우저 컴포넌트가 하므로, 컴포넌트가 위치를 맞출 때와 같이
+study_idx 를 바꾸고 다시 실행하는 것으로 흉내 낸다.
+
+    python benchmarks/bench_sessions.py [세션 수] [세션당 문제 수] [정답 비율]
+"""
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import attempts  # noqa: E402
+import storage  # noqa: E402
+import write_behind  # noqa: E402
+from corpus import open_corpus  # noqa: E402
+from quota import QuotaUserStore  # noqa: E402
+
+SESSIONS = 8
+STUDY_MOVES = 10
+HEARTS = 3
+LATENCY = 0.05      # 가짜 저장소 호출 한 번의 시간 (초)
+ERROR_RATE = 0.05   # 가짜 저장소가 사용량 오류를 내는 비율
+BACKOFF = 0.05      # 재시도 간격 (운영보다 짧게 해서 벤치마크 시간을 줄임)
+# share_runtime() 이 바꾸는 Streamlit 내부가 이 버전 기준 (requirements.txt 와 같게 유지)
+STREAMLIT_VERSION = "1.65.0"
+
+# 세션(닉네임)별로 지금 실행 중인 동작 (스크립트는 AppTest 의 스크립트 스레드에서 실행되므로 닉네임으로 찾음)
+_actions = {}
+
+
+def _action(nickname):
+    return _actions.get(nickname, '*')
+
+
+class FakeQuotaError(Exception):
+    """시트의 429 흉내"""
+
+
+class FakeStore(storage.UserStore):
+    """메모리에만 저장하고 호출 수를 세는 저장소"""
+
+    def __init__(self):
+        self.data = {}
+        self.attempts = []
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(1)
+
+    def _remote(self):
+        """시트 호출 한 번: 시간이 걸리고 가끔 사용량 오류"""
+        time.sleep(LATENCY)
+        with self._lock:
+            failed = self._rng.random() < ERROR_RATE
+            if failed:
+                self.calls['*', 'quota_errors'] += 1
+        if failed:
+            raise FakeQuotaError("429 Quota exceeded")
+
+    def read(self, nickname):
+        self._remote()
+        with self._lock:
+            self.calls[_action(nickname), 'read'] += 1
+            row = self.data.get(nickname)
+        return dict(row) if row else None
+
+    def write_many(self, items):
+        # 백그라운드 스레드에서 불리므로 동작별이 아니라 전체로 셈
+        self._remote()
+        with self._lock:
+            self.calls['*', 'write_many'] += 1
+            self.calls['*', 'users_written'] += len(items)
+            for nickname, fields in items.items():
+                self.data.setdefault(nickname, dict.fromkeys(storage.FIELDS, '')).update(fields)
+
+    def append_attempts(self, attempts):
+        self._remote()
+        with self._lock:
+            self.calls['*', 'append_attempts'] += 1
+            self.attempts.extend(attempts)
+
+    def read_attempts(self):
+        self._remote()
+        with self._lock:
+            self.calls['*', 'read_attempts'] += 1
+            return list(self.attempts)
+
+
+class CountingQueue(write_behind.WriteBehindQueue):
+    """저장 요청(submit)을 동작별로 셈"""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingQueue.instances.append(self)
+
+    def submit(self, nickname, fields):
+        with store._lock:
+            store.calls[_action(nickname), 'submit'] += 1
+        super().submit(nickname, fields)
+
+
+class TrackedLog(attempts.AttemptLog):
+    """끝나고 남은 기록을 저장하려고 만든 것을 기억"""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        TrackedLog.instances.append(self)
+
+
+store = FakeStore()
+
+
+def share_runtime():
+    """AppTest 는 실행할 때마다 전역 Runtime._instance 를 만들고 끝나면 None 으로 지운다.
+    여러 스레드에서 동시에 실행하면 다른 세션이 실행 중일 때 지워지므로, 마지막으로 만든 것을 계속 씀.
+    스크립트 캐시도 실제 서버처럼 모든 세션이 하나를 씀 (세션마다 따로 컴파일하면 여러 스레드가
+    동시에 compile() 을 불러 SystemError 가 남)
+
+    Runtime.instance / Runtime.exists / Runtime._instance, local_script_runner.ScriptCache 는
+    공개 API 가 아니므로 STREAMLIT_VERSION 에서만 쓴다."""
+    import streamlit
+    if streamlit.__version__ != STREAMLIT_VERSION:
+        raise RuntimeError(f"streamlit {STREAMLIT_VERSION} 기준 벤치마크입니다 (설치된 버전 {streamlit.__version__})")
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+    last = [None]
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[0] = cls._instance
+        if last[0] is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or last[0] is not None)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class Session:
+    """AppTest 한 개 = 브라우저 탭 하나"""
+
+    def __init__(self, app_test, nickname, timings):
+        self.at = app_test
+        self.nickname = nickname
+        self.timings = timings
+
+    def run(self, action):
+        _actions[self.nickname] = action
+        t0 = time.perf_counter()
+        self.at.run()
+        self.timings[action].append((time.perf_counter() - t0) * 1000)
+        if self.at.exception:
+            raise RuntimeError(f"{self.nickname} / {action}: {self.at.exception[0].value}")
+
+    def click(self, label, action):
+        for button in self.at.button:
+            if button.label == label:
+                button.click()
+                return self.run(action)
+        raise LookupError(f"{self.nickname} / {action}: '{label}' 버튼이 없습니다")
+
+    def state(self, key):
+        return self.at.session_state[key]
+
+
+def scenario(session, corpus, rng, questions, accuracy):
+    """한 세션의 사용 흐름 (재실행마다 한 번씩 yield)"""
+    at = session.at
+    session.run('open')
+    yield
+
+    at.text_input[0].input(session.nickname)
+    session.click("입장하기", 'login')
+    yield
+
+    # 통계를 켜면 지난 기록을 읽음 (여러 세션이 동시에 켜면 읽기 하나로 합쳐짐)
+    at.toggle(key="show_stats").set_value(True)
+    session.run('stats')
+    yield
+    at.toggle(key="show_stats").set_value(False)
+    session.run('stats')
+    yield
+
+    session.click("말씀 학습", 'study_open')
+    yield
+    for _ in range(STUDY_MOVES):
+        at.session_state['study_idx'] = rng.randrange(len(corpus))
+        session.run('study_move')
+        yield
+    if len(at.selectbox):
+        at.selectbox[0].select(rng.choice(at.selectbox[0].options))
+        session.run('study_category')
+        yield
+    session.click("🏠 홈", 'home')
+    yield
+
+    session.click("말씀 암송", 'test_start')
+    yield
+    if session.state('page') == 'test_prep':
+        session.click("시작하기", 'test_start')
+        yield
+
+    asked = 0
+    while session.state('page') == 'test':
+        if asked >= questions:
+            session.click("끝", 'test_finish')
+            yield
+            break
+        asked += 1
+        verse = corpus.get(session.state('test_verse_id'))
+        if rng.random() < 0.2:
+            session.click(f"힌트 ({session.state('test_hint_level')})", 'test_hint')
+            yield
+        content = verse.content
+        if rng.random() >= accuracy:
+            # 한 단어를 빼먹음 → 틀린 부분 비교 화면
+            words = content.split()
+            del words[rng.randrange(len(words))]
+            content = ' '.join(words)
+        next(t for t in at.text_input if t.label == "장절 입력").input(verse.address)
+        next(t for t in at.text_area if t.label == "내용 입력").input(content)
+        session.click("완료", 'test_answer')
+        yield
+        if session.state('page') == 'test' and session.state('test_status') == 'wrong':
+            session.click("다음", 'test_next')
+            yield
+
+    if session.state('page') == 'test_result':
+        for box in at.checkbox[:HEARTS]:
+            box.check()
+        if len(at.checkbox):
+            session.click("❤️ 저장 반영", 'result_hearts')
+            yield
+        session.click("홈으로 돌아가기", 'home')
+        yield
+
+    session.click("로그아웃", 'logout')
+    yield
+
+
+def main():
+    args = sys.argv[1:]
+    sessions = int(args[0]) if len(args) > 0 else SESSIONS
+    accuracy = float(args[2]) if len(args) > 2 else 0.7
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        print("streamlit 이 설치되어 있지 않습니다.")
+        return 2
+
+    os.chdir(ROOT)
+    try:
+        share_runtime()
+    except RuntimeError as e:
+        print(e)
+        return 2
+    os.environ["BIBLE_STORAGE_BACKEND"] = "fake"
+    # app.py 는 실행될 때마다 이 모듈들에서 이름을 가져오므로 여기서 바꿔 두면 가짜가 쓰임
+    guarded = QuotaUserStore(store, retryable=lambda e: isinstance(e, FakeQuotaError), backoff=BACKOFF)
+    storage.create_store = lambda config: guarded
+    write_behind.WriteBehindQueue = CountingQueue
+    attempts.AttemptLog = TrackedLog
+
+    corpus = open_corpus(os.path.join(ROOT, "bible_verses_clean.csv"), os.path.join(ROOT, "bible_verses_clean.bin"))
+    questions = int(args[1]) if len(args) > 1 else len(corpus)
+
+    timings = defaultdict(list)
+    rng = random.Random(0)
+    running = []
+    for i in range(sessions):
+        session = Session(AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60), f"user{i}", timings)
+        running.append(scenario(session, corpus, random.Random(rng.random()), questions, accuracy))
+
+    def drive(steps):
+        for _ in steps:
+            pass
+
+    # 세션마다 스레드 하나: 재실행, 저장소 호출, 캐시 접근이 실제로 겹침
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(drive, steps) for steps in running]:
+            future.result()
+    elapsed = time.perf_counter() - t0
+    # 백그라운드에 남은 저장을 마무리하고 셈
+    for queue in CountingQueue.instances:
+        queue.flush()
+    for log in TrackedLog.instances:
+        log.flush()
+
+    print(f"{sessions} sessions, {questions} questions each, accuracy {accuracy:.0%} ({elapsed:.1f}s)")
+    print(f"  {'action':<16}{'runs':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'reads':>7}{'saves':>7}")
+    for action, values in timings.items():
+        values.sort()
+        print(
+            f"  {action:<16}{len(values):>6}"
+            + ''.join(f"{percentile(values, p):>9.1f}" for p in (50, 90, 99, 100))
+            + f"{store.calls[action, 'read']:>7}{store.calls[action, 'submit']:>7}"
+        )
+    all_runs = sorted(v for values in timings.values() for v in values)
+    print(f"  {'(all)':<16}{len(all_runs):>6}" + ''.join(f"{percentile(all_runs, p):>9.1f}" for p in (50, 90, 99, 100)))
+    print(f"  storage write_many {store.calls['*', 'write_many']}, users written {store.calls['*', 'users_written']}, "
+          f"append_attempts {store.calls['*', 'append_attempts']} ({len(store.attempts)} attempts), "
+          f"read_attempts {store.calls['*', 'read_attempts']}")
+    quota = guarded.stats()
+    print(f"  quota: reads shared {quota['reads_shared']}, read waits {quota['read_bucket']['waits']} "
+          f"({quota['read_bucket']['wait_s']}s), write waits {quota['write_bucket']['waits']} "
+          f"({quota['write_bucket']['wait_s']}s), 429s {store.calls['*', 'quota_errors']} "
+          f"(retried {quota['quota_retries']}), stale reads {quota['stale_reads']}")
+    print(f"  peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""콜드 스타트 벤치마크: 새 프로세스에서 로그인 화면이 처음 그려질 때까지의 시간
+
+프로세스마다 streamlit 을 새로 읽고 AppTest 로 app.py 를 한 번 실행해서
+- streamlit 을 읽는 시간
+- 빈 스크립트를 그리는 시간 (AppTest 기본 비용)
+- 로그인 화면을 그리는 시간
+을 잰다. 로그인 화면 시간이 예산을 넘거나, 로그인 화면에서 필요 없는 무거운 모듈
+(gspread, oauth2client, pandas, sqlite3 ...) 이 읽혔으면 실패(종료 코드 1)로 끝난다.
+
+    python benchmarks/bench_startup.py [반복 횟수] [예산(ms)]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = 5
+BUDGET_MS = 400
+# 로그인 화면까지는 읽지 않아야 하는 모듈 (빈 스크립트에서도 읽히는 것은 제외하고 봄)
+LAZY_MODULES = ('gspread', 'oauth2client', 'pandas', 'numpy', 'difflib', 'sqlite3')
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+
+empty = AppTest.from_string("import streamlit as st\nst.write('')")
+empty.run()
+t2 = time.perf_counter()
+baseline = set(sys.modules)
+
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+t3 = time.perf_counter()
+
+json.dump({
+    'import_ms': (t1 - t0) * 1000,
+    'empty_ms': (t2 - t1) * 1000,
+    'login_ms': (t3 - t2) * 1000,
+    'title': [t.value for t in at.title],
+    'errors': [str(e.value) for e in at.exception],
+    'loaded': sorted(m for m in set(sys.modules) - baseline if m.split('.')[0] in sys.argv[2].split(',')),
+}, sys.stdout)
+"""
+
+
+def run_once():
+    env = dict(os.environ, BIBLE_STORAGE_BACKEND="sqlite", BIBLE_SQLITE_PATH=":memory:")
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, os.path.join(ROOT, "app.py"), ','.join(LAZY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main():
+    args = sys.argv[1:]
+    runs = int(args[0]) if len(args) > 0 else RUNS
+    budget = float(args[1]) if len(args) > 1 else BUDGET_MS
+    try:
+        import streamlit  # noqa: F401
+    except ImportError:
+        print("streamlit 이 설치되어 있지 않습니다.")
+        return 2
+
+    results = [run_once() for _ in range(runs)]
+    for key in ('import_ms', 'empty_ms', 'login_ms'):
+        values = [r[key] for r in results]
+        print(f"  {key:<12}median {statistics.median(values):>8.1f}   max {max(values):>8.1f}")
+
+    failures = []
+    last = results[-1]
+    if last['errors']:
+        failures.append(f"로그인 화면 오류: {last['errors']}")
+    elif "📖 100절 암송학교" not in last['title']:
+        failures.append(f"로그인 화면이 아님: {last['title']}")
+    login_ms = statistics.median(r['login_ms'] for r in results)
+    if login_ms > budget:
+        failures.append(f"로그인 화면 {login_ms:.1f}ms > 예산 {budget:.0f}ms")
+    loaded = sorted({m for r in results for m in r['loaded']})
+    if loaded:
+        failures.append(f"로그인 화면에서 읽힌 무거운 모듈: {', '.join(loaded)}")
+
+    for failure in failures:
+        print("FAIL", failure)
+    if not failures:
+        print(f"OK (예산 {budget:.0f}ms)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
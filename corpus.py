@@ -0,0 +1,406 @@
+"""말씀 데이터 인덱스
+
+버튼을 누를 때마다 스크립트가 다시 실행되므로, 페이지마다 DataFrame 을 필터링하지 않고
+한 번 만든 인덱스에서 바로 꺼내 쓴다.
+
+성경 전체(약 3만 1천 절)까지 다룰 수 있도록 파일을 한 번만 훑어서 번호/구분과
+청크 위치만 기억하고, 본문은 필요한 청크만 읽어서 최근 몇 개만 메모리에 둔다.
+
+배포 시에는 CSV 를 미리 컴파일한 바이너리 파일(.bin)을 mmap 으로 열어 쓴다.
+(NFC 정규화된 본문, 단어 목록, 장절 파싱 결과(references.parse_reference), 구분 번호가 모두 들어 있음)
+
+    python corpus.py build [bible_verses_clean.csv] [bible_verses_clean.bin]
+"""
+import bisect
+import csv
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+
+from references import Reference, parse_reference
+
+logger = logging.getLogger(__name__)
+
+ALL = '전체보기'
+
+CHUNK_SIZE = 256
+CACHED_CHUNKS = 8
+
+_PARSE = object()
+
+
+class Verse:
+    """말씀 한 절"""
+    __slots__ = ('id', 'category', 'address', 'content', 'pos', 'tokens', 'ref')
+
+    def __init__(self, id, category, address, content, pos, tokens=_PARSE, ref=_PARSE):
+        self.id = id
+        self.category = category
+        self.address = address
+        self.content = content
+        self.pos = pos  # 파일에서의 순서
+        self.tokens = tuple(content.split()) if tokens is _PARSE else tokens
+        self.ref = parse_reference(address) if ref is _PARSE else ref
+
+    def __repr__(self):
+        return f"Verse({self.id}, {self.address!r})"
+
+    @property
+    def first_word(self):
+        return self.tokens[0] if self.tokens else ""
+
+    @property
+    def last_word(self):
+        return self.tokens[-1] if self.tokens else ""
+
+    @property
+    def chapter_label(self):
+        """문제 범위 힌트 (예: '창세기 1')"""
+        if self.ref:
+            return f"{self.ref.book_name} {self.ref.chapter}"
+        return self.address.split(':')[0]
+
+
+def _records(f):
+    """CSV 파일(바이너리)에서 (시작 위치, 레코드 바이트) 를 차례로 — 따옴표 안 줄바꿈도 처리"""
+    start = f.tell()
+    buf = b''
+    for line in iter(f.readline, b''):
+        buf += line
+        if buf.count(b'"') % 2 == 0:
+            if buf.strip():
+                yield start, buf
+            start += len(buf)
+            buf = b''
+    if buf.strip():
+        yield start, buf
+
+
+def _parse(raw):
+    return next(csv.reader([raw.decode('utf-8-sig').rstrip('\r\n')]))
+
+
+def _nfc(text):
+    return unicodedata.normalize('NFC', text)
+
+
+class Corpus:
+    """인덱스 공통 조회 (하위 클래스가 _ids, _by_category, _pos_map, categories, at() 를 채움)
+    그대로 만들면 빈 인덱스"""
+
+    def __init__(self):
+        self._ids = array('I')
+        self.categories = ()
+        self._by_category = {ALL: self._ids}
+        self._pos_map = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, verse_id):
+        return self.position(verse_id) is not None
+
+    def position(self, verse_id):
+        """번호의 파일 내 순서 (없으면 None)"""
+        if self._pos_map is not None:
+            return self._pos_map.get(verse_id)
+        pos = bisect.bisect_left(self._ids, verse_id)
+        if pos < len(self._ids) and self._ids[pos] == verse_id:
+            return pos
+        return None
+
+    def ids(self, category=ALL):
+        """구분에 속한 번호 목록 (순서 유지, 복사하지 않음)"""
+        return self._by_category.get(category, ())
+
+    def page(self, category, page_no, page_size):
+        """구분의 page_no 번째 페이지에 해당하는 번호 목록"""
+        return self.ids(category)[page_no * page_size:(page_no + 1) * page_size]
+
+    def at(self, pos):
+        """파일 순서 pos 의 말씀"""
+        raise IndexError(pos)
+
+    def get(self, verse_id):
+        pos = self.position(verse_id)
+        return None if pos is None else self.at(pos)
+
+    def select(self, verse_ids):
+        """주어진 번호들의 말씀을 파일 순서대로"""
+        positions = sorted(p for p in map(self.position, verse_ids) if p is not None)
+        return [self.at(p) for p in positions]
+
+    def order(self, verse_ids):
+        """주어진 번호들을 파일 순서대로 (없는 번호는 빼고, 본문은 읽지 않음)"""
+        positions = sorted(p for p in map(self.position, verse_ids) if p is not None)
+        return [self._ids[p] for p in positions]
+
+    def _index_ids(self):
+        # 번호가 오름차순이면 이진 탐색, 아니면 번호 → 위치 사전
+        ids = self._ids
+        if all(a < b for a, b in zip(ids, ids[1:])):
+            self._pos_map = None
+        else:
+            self._pos_map = {vid: pos for pos, vid in enumerate(ids)}
+
+
+class VerseIndex(Corpus):
+    """CSV 에서 만든 인덱스: 구분 목록, 구분 → 번호 목록, 번호 → 말씀 (본문은 청크 단위로 지연 로딩)"""
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, cached_chunks=CACHED_CHUNKS):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.cached_chunks = cached_chunks
+        self._lock = threading.Lock()
+        self._chunks = OrderedDict()
+        self.chunk_loads = 0
+
+        ids = array('I')
+        cat_codes = array('H')
+        categories = {}
+        by_category = {}
+        offsets = array('Q')
+
+        with open(path, 'rb') as f:
+            header = _parse(f.readline())
+            self._cols = tuple(header.index(name) for name in ('번호', '구분', '장절', '내용'))
+            id_col, cat_col = self._cols[0], self._cols[1]
+            for pos, (start, raw) in enumerate(_records(f)):
+                if pos % chunk_size == 0:
+                    offsets.append(start)
+                fields = _parse(raw)
+                vid = int(fields[id_col])
+                cat = fields[cat_col]
+                code = categories.setdefault(cat, len(categories))
+                ids.append(vid)
+                cat_codes.append(code)
+                by_category.setdefault(cat, array('I')).append(vid)
+            offsets.append(f.tell())
+
+        self._ids = ids
+        self._cat_codes = cat_codes
+        self._offsets = offsets
+        self.categories = tuple(categories)
+        self._by_category = by_category
+        self._by_category[ALL] = ids
+        self._index_ids()
+
+    def at(self, pos):
+        """파일 순서 pos 의 말씀"""
+        chunk = self._chunk(pos // self.chunk_size)
+        return chunk[pos % self.chunk_size]
+
+    def _chunk(self, n):
+        with self._lock:
+            chunk = self._chunks.get(n)
+            if chunk is not None:
+                self._chunks.move_to_end(n)
+                return chunk
+
+        chunk = self._load_chunk(n)
+        with self._lock:
+            self._chunks[n] = chunk
+            self._chunks.move_to_end(n)
+            while len(self._chunks) > self.cached_chunks:
+                self._chunks.popitem(last=False)
+            self.chunk_loads += 1
+        return chunk
+
+    def _load_chunk(self, n):
+        start, end = self._offsets[n], self._offsets[n + 1]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start).decode('utf-8')
+
+        id_col, _, addr_col, content_col = self._cols
+        first = n * self.chunk_size
+        chunk = []
+        rows = (fields for fields in csv.reader(io.StringIO(data)) if fields)
+        for i, fields in enumerate(rows):
+            pos = first + i
+            chunk.append(Verse(
+                int(fields[id_col]),
+                self.categories[self._cat_codes[pos]],
+                _nfc(fields[addr_col]),
+                _nfc(fields[content_col]),
+                pos,
+            ))
+        return tuple(chunk)
+
+
+# --- 컴파일된 말씀 파일 ---
+MAGIC = b'BVRC'
+# 2: 책을 이름표 대신 책 번호(references.BOOKS 순서, 1 ~ 66)로 저장
+FORMAT_VERSION = 2
+
+# magic, 버전, 절 수, 이름표/레코드/단어/문자열 구간 길이, 본문 sha256, 원본 CSV sha256
+_HEADER = struct.Struct('<4sHIIIII32s32s')
+# 번호, 구분, 책 번호, 장, 절(없으면 0), 끝 절, 장절(위치, 길이), 본문(위치, 길이), 단어(시작 번호, 개수)
+_RECORD = struct.Struct('<IHHHHHIHIHIH')
+# 단어의 본문 내 바이트 위치 (시작, 끝)
+_TOKEN = struct.Struct('<HH')
+_NO_BOOK = 0xFFFF
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    return h.digest()
+
+
+def compile_corpus(csv_path, out_path):
+    """CSV 를 읽어 mmap 용 바이너리 파일로 저장. 절 수를 돌려줌"""
+    index = VerseIndex(csv_path)
+    verses = [index.at(p) for p in range(len(index))]
+
+    categories = {cat: i for i, cat in enumerate(index.categories)}
+    names = json.dumps({'categories': list(categories)}, ensure_ascii=False).encode('utf-8')
+
+    records = bytearray()
+    tokens = bytearray()
+    strings = bytearray()
+    token_count = 0
+    for v in verses:
+        addr = v.address.encode('utf-8')
+        content = v.content.encode('utf-8')
+        addr_off = len(strings)
+        strings += addr
+        content_off = len(strings)
+        strings += content
+
+        # 단어 위치는 본문 바이트 기준
+        first_token = token_count
+        cursor = 0
+        for word in v.tokens:
+            raw = word.encode('utf-8')
+            start = content.index(raw, cursor)
+            cursor = start + len(raw)
+            tokens += _TOKEN.pack(start, cursor)
+            token_count += 1
+
+        book, chapter, verse_no, verse_end = v.ref if v.ref else (_NO_BOOK, 0, 0, 0)
+        records += _RECORD.pack(
+            v.id, categories[v.category], book, chapter, verse_no or 0, verse_end or 0,
+            addr_off, len(addr), content_off, len(content), first_token, len(v.tokens),
+        )
+
+    payload = names + records + tokens + strings
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(verses), len(names), len(records), len(tokens), len(strings),
+        hashlib.sha256(payload).digest(), file_sha256(csv_path),
+    )
+    tmp = out_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp, out_path)
+    return len(verses)
+
+
+class CorpusFormatError(ValueError):
+    pass
+
+
+class CompiledCorpus(Corpus):
+    """컴파일된 바이너리 파일을 mmap 으로 연 인덱스 (말씀은 읽을 때 만들고 최근 것만 캐시)"""
+
+    def __init__(self, path, source_path=None, verify=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        mm = self._mm
+        if len(mm) < _HEADER.size:
+            raise CorpusFormatError("파일이 너무 짧습니다")
+        magic, version, count, names_len, records_len, tokens_len, strings_len, digest, source_digest = \
+            _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise CorpusFormatError("말씀 파일 형식이 아닙니다")
+        if version != FORMAT_VERSION:
+            raise CorpusFormatError(f"지원하지 않는 버전: {version}")
+        payload_start = _HEADER.size
+        if len(mm) != payload_start + names_len + records_len + tokens_len + strings_len:
+            raise CorpusFormatError("파일 길이가 맞지 않습니다")
+        if verify and hashlib.sha256(memoryview(mm)[payload_start:]).digest() != digest:
+            raise CorpusFormatError("체크섬이 맞지 않습니다")
+        if source_path and os.path.exists(source_path) and file_sha256(source_path) != source_digest:
+            raise CorpusFormatError("원본 CSV 가 바뀌었습니다. 다시 빌드하세요")
+
+        names = json.loads(bytes(mm[payload_start:payload_start + names_len]).decode('utf-8'))
+        self.categories = tuple(names['categories'])
+        self._records_at = payload_start + names_len
+        self._tokens_at = self._records_at + records_len
+        self._strings_at = self._tokens_at + tokens_len
+        self._count = count
+
+        ids = array('I')
+        by_category = {cat: array('I') for cat in self.categories}
+        for rec in _RECORD.iter_unpack(mm[self._records_at:self._tokens_at]):
+            ids.append(rec[0])
+            by_category[self.categories[rec[1]]].append(rec[0])
+        self._ids = ids
+        self._by_category = by_category
+        self._by_category[ALL] = ids
+        self._index_ids()
+
+        self._verse = lru_cache(maxsize=4096)(self._load_verse)
+
+    def at(self, pos):
+        if not 0 <= pos < self._count:
+            raise IndexError(pos)
+        return self._verse(pos)
+
+    def _load_verse(self, pos):
+        mm = self._mm
+        (vid, cat, book, chapter, verse_no, verse_end,
+         addr_off, addr_len, content_off, content_len, first_token, token_count) = \
+            _RECORD.unpack_from(mm, self._records_at + pos * _RECORD.size)
+
+        base = self._strings_at
+        address = mm[base + addr_off:base + addr_off + addr_len].decode('utf-8')
+        content_bytes = mm[base + content_off:base + content_off + content_len]
+        tokens = tuple(
+            content_bytes[start:end].decode('utf-8')
+            for start, end in _TOKEN.iter_unpack(
+                mm[self._tokens_at + first_token * _TOKEN.size:self._tokens_at + (first_token + token_count) * _TOKEN.size]
+            )
+        )
+        ref = Reference(book, chapter, verse_no or None, verse_end or None) if book != _NO_BOOK else None
+        return Verse(vid, self.categories[cat], address, content_bytes.decode('utf-8'), pos, tokens, ref)
+
+
+def open_corpus(csv_path, compiled_path=None):
+    """컴파일된 파일이 있고 유효하면 mmap 으로, 아니면 CSV 를 직접 읽음"""
+    if compiled_path and os.path.exists(compiled_path):
+        try:
+            return CompiledCorpus(compiled_path, source_path=csv_path)
+        except (CorpusFormatError, OSError, struct.error) as e:
+            logger.warning("컴파일된 말씀 파일을 쓸 수 없어 CSV 를 읽습니다: %s", e)
+    return VerseIndex(csv_path)
+
+
+def main(argv):
+    if not argv or argv[0] != 'build':
+        print(__doc__)
+        return 1
+    csv_path = argv[1] if len(argv) > 1 else "bible_verses_clean.csv"
+    out_path = argv[2] if len(argv) > 2 else os.path.splitext(csv_path)[0] + ".bin"
+    count = compile_corpus(csv_path, out_path)
+    print(f"{out_path}: {count}절")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,156 @@
+"""말씀 묶음(덱) 여러 개
+
+기본 묶음(bible_verses_clean.csv) 말고도 decks/ 폴더의 CSV 마다 묶음이 하나씩 생긴다.
+이름은 파일 이름이고, 같은 이름의 .bin (python corpus.py build 로 만든 파일)이 있으면 그것을 연다.
+묶음은 누군가 처음 고를 때 읽고, 읽어 둔 묶음(말씀 목록 + 검색 색인)의 크기 합이
+max_bytes 를 넘으면 가장 오래 쓰지 않은 묶음부터 내려놓는다.
+
+기본 묶음의 이름은 '' 이다. 사용자 데이터 칸(SavedVerses, Review)에는 첫 줄에 기본 묶음의 값,
+다음 줄부터 "이름<TAB>값" 으로 다른 묶음의 값을 적으므로, 기본 묶음만 쓰던 예전 값도 그대로 읽힌다.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from corpus import open_corpus
+from quota import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT = ''
+DEFAULT_LABEL = "기본"
+DECKS_DIR = "decks"
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def label(name):
+    return name or DEFAULT_LABEL
+
+
+def discover(default_csv, default_compiled=None, directory=DECKS_DIR):
+    """{이름: (CSV 경로, 컴파일된 파일 경로 또는 None)} — 기본 묶음이 먼저, 나머지는 이름 순"""
+    sources = {DEFAULT: (default_csv, default_compiled)}
+    try:
+        files = sorted(os.listdir(directory))
+    except OSError:
+        return sources
+    for file in files:
+        name, ext = os.path.splitext(file)
+        if ext.lower() != '.csv' or not name:
+            continue
+        compiled = os.path.join(directory, name + '.bin')
+        sources[name] = (os.path.join(directory, file), compiled if os.path.exists(compiled) else None)
+    return sources
+
+
+def pack(values):
+    """{묶음 이름: 값} → 한 칸에 저장할 문자열"""
+    lines = [values.get(DEFAULT, '')]
+    lines += [f"{name}\t{value}" for name, value in values.items() if name != DEFAULT and value]
+    return '\n'.join(lines)
+
+
+def unpack(text):
+    """칸의 문자열 → {묶음 이름: 값} (예전 값은 기본 묶음의 값)"""
+    lines = str(text or '').split('\n')
+    values = {DEFAULT: lines[0]}
+    for line in lines[1:]:
+        name, sep, value = line.partition('\t')
+        if sep and name:
+            values[name] = value
+    return values
+
+
+class Deck:
+    __slots__ = ('name', 'corpus', 'search', 'nbytes')
+
+    def __init__(self, name, corpus, nbytes):
+        self.name = name
+        self.corpus = corpus
+        self.search = None   # 처음 검색할 때 만듦
+        self.nbytes = nbytes
+
+
+class DeckLibrary:
+    """묶음을 이름으로 꺼내 줌 (처음 꺼낼 때 읽고, 크기 합이 max_bytes 를 넘으면 오래된 것부터 내려놓음)"""
+
+    def __init__(self, sources, max_bytes=MAX_BYTES, opener=open_corpus):
+        self._sources = dict(sources)
+        self._max_bytes = max_bytes
+        self._open = opener
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()  # 이름 → Deck (최근에 쓴 것이 뒤)
+        self._flight = SingleFlight()  # 여러 세션이 같은 묶음을 동시에 골라도 한 번만 읽음
+
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def names(self):
+        return list(self._sources)
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def get(self, name):
+        """Deck (없는 이름이면 KeyError)"""
+        with self._lock:
+            deck = self._loaded.get(name)
+            if deck is not None:
+                self._loaded.move_to_end(name)
+                return deck
+        return self._flight.do(('load', name), lambda: self._load(name))
+
+    def _load(self, name):
+        csv_path, compiled_path = self._sources[name]
+        corpus = self._open(csv_path, compiled_path)
+        # 컴파일된 파일은 mmap, CSV 는 번호 목록 + 청크 몇 개 → 파일 크기로 어림
+        path = compiled_path if compiled_path and os.path.exists(compiled_path) else csv_path
+        deck = Deck(name, corpus, os.path.getsize(path))
+        with self._lock:
+            self._loaded[name] = deck
+            self.loads += 1
+            self._evict(keep=name)
+        logger.info("말씀 묶음 '%s' 읽음 (%d절)", label(name), len(corpus))
+        return deck
+
+    def search_index(self, name):
+        """묶음의 검색 색인 (처음 부를 때 만들고 묶음과 함께 내려놓음)"""
+        deck = self.get(name)
+        if deck.search is None:
+            self._flight.do(('search', name), lambda: self._build_search(deck))
+        return deck.search
+
+    def _build_search(self, deck):
+        if deck.search is not None:
+            return
+        from search import SearchIndex  # 검색할 때만 필요
+        index = SearchIndex(deck.corpus)
+        with self._lock:
+            deck.search = index
+            deck.nbytes += index.nbytes()
+            self._evict(keep=deck.name)
+
+    def _evict(self, keep):
+        # self._lock 안에서 호출. 방금 쓴 묶음은 크기가 넘어도 남김
+        total = sum(d.nbytes for d in self._loaded.values())
+        while total > self._max_bytes and len(self._loaded) > 1:
+            name, deck = next(iter(self._loaded.items()))
+            if name == keep:
+                self._loaded.move_to_end(name)
+                continue
+            del self._loaded[name]
+            total -= deck.nbytes
+            self.evictions += 1
+            logger.info("말씀 묶음 '%s' 내려놓음", label(name))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'decks': len(self._sources),
+                'loaded': [label(n) for n in self._loaded],
+                'loaded_bytes': sum(d.nbytes for d in self._loaded.values()),
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
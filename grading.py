@@ -0,0 +1,269 @@
+"""암송 채점 — 사용자가 쓴 내용과 정답의 단어 정렬
+
+단어 단위로 Myers 차이 알고리즘을 돌려 빠진 단어/추가된 단어/바뀐 단어를 찾고,
+바뀐 단어는 다시 글자 단위로 정렬해서 틀린 글자만 표시한다.
+한 단어를 더 쓰거나 틀려도 그 뒤의 단어들이 모두 틀린 것으로 밀리지 않는다.
+
+한 페이지를 한꺼번에 낼 때는 grade_batch 로 모든 답을 한 번에 채점한다.
+"""
+import html
+import re
+import unicodedata
+from functools import lru_cache
+
+from references import addresses_match
+
+EQUAL = 'equal'
+MISSING = 'missing'    # 정답에는 있는데 사용자가 빠뜨린 단어
+EXTRA = 'extra'        # 사용자가 더 쓴 단어
+CHANGED = 'changed'    # 비슷하지만 다르게 쓴 단어
+
+# 길이 제한: 아주 긴 입력도 빠르게 끝나도록
+MAX_USER_WORDS = 400
+MAX_EDITS = 200
+MAX_REFINE_CHARS = 40
+# 자모 단위 유사도가 이 값 이상이면 빠짐+추가 대신 '바뀐 단어' 로 묶음
+CHANGED_SIMILARITY = 0.5
+
+MISSING_MARK = "<span class='diff-red'>˅</span>"
+
+
+# 정답 단어는 매번 같으므로 이스케이프 결과도 재사용
+_escape = lru_cache(maxsize=65536)(html.escape)
+
+
+_PUNCT = re.compile(r'[^\w\s]+')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(text):
+    return unicodedata.normalize('NFC', text)
+
+
+def answer_key(text):
+    """채점용 정규화: NFKC, 문장 부호 제거, 공백은 하나로"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return _SPACE.sub(' ', _PUNCT.sub('', text)).strip()
+
+
+# 정답 쪽은 말씀마다 한 번만 정규화
+_correct_key = lru_cache(maxsize=4096)(answer_key)
+
+
+def grade_batch(answers):
+    """[(사용자 장절, 사용자 내용, 정답 장절, 정답 내용)] → [(장절 맞음, 내용 맞음)]
+
+    같은 답은 한 번만 정규화하고 정답 쪽 정규화는 캐시를 쓰므로, 한 페이지 전체를 한 번에 채점해도
+    답 개수만큼의 비교로 끝난다. 틀린 답의 단어 정렬(diff_strings)은 화면에 보일 때만 계산한다.
+    """
+    keys = {}
+    results = []
+    for user_addr, user_content, real_addr, real_content in answers:
+        key = keys.get(user_content)
+        if key is None:
+            key = keys[user_content] = answer_key(user_content)
+        results.append((addresses_match(user_addr, real_addr), key == _correct_key(real_content)))
+    return results
+
+
+@lru_cache(maxsize=4096)
+def correct_tokens(correct_text):
+    """정답 단어 목록 (말씀마다 한 번만 계산)"""
+    return tuple(normalize(correct_text).split())
+
+
+def _myers(a, b, max_edits=MAX_EDITS):
+    """a → b 편집 스크립트 [(tag, i, j)] — tag 는 EQUAL / MISSING(a 에서 삭제) / EXTRA(b 에 추가)
+    편집 거리가 max_edits 를 넘으면 None"""
+    n, m = len(a), len(b)
+    limit = min(n + m, max_edits)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+    for d in range(limit + 1):
+        trace.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m, offset)
+    return None
+
+
+def _backtrack(trace, x, y, offset):
+    ops = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[offset + prev_k]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            ops.append((EQUAL, x, y))
+        if d > 0:
+            if x == prev_x:
+                ops.append((EXTRA, None, y - 1))
+            else:
+                ops.append((MISSING, x - 1, None))
+        x, y = prev_x, prev_y
+    ops.reverse()
+    return ops
+
+
+def _common_ends(a, b):
+    """앞뒤로 같은 원소 수 (pre, suf) — 겹치지 않게 셈"""
+    n, m = len(a), len(b)
+    pre = 0
+    while pre < n and pre < m and a[pre] == b[pre]:
+        pre += 1
+    suf = 0
+    while suf < n - pre and suf < m - pre and a[n - 1 - suf] == b[m - 1 - suf]:
+        suf += 1
+    return pre, suf
+
+
+def _fallback(a, b):
+    """편집이 너무 많을 때: 앞뒤 공통 부분만 맞추고 가운데는 통째로 빠짐/추가"""
+    n, m = len(a), len(b)
+    pre, suf = _common_ends(a, b)
+    ops = [(EQUAL, i, i) for i in range(pre)]
+    ops += [(MISSING, i, None) for i in range(pre, n - suf)]
+    ops += [(EXTRA, None, j) for j in range(pre, m - suf)]
+    ops += [(EQUAL, n - suf + i, m - suf + i) for i in range(suf)]
+    return ops
+
+
+def _align_words(a, b):
+    """앞뒤 공통 단어는 바로 맞추고 가운데만 Myers 로 정렬"""
+    n, m = len(a), len(b)
+    pre, suf = _common_ends(a, b)
+    mid_a, mid_b = a[pre:n - suf], b[pre:m - suf]
+    if not mid_a or not mid_b:
+        mid = [(MISSING, i, None) for i in range(len(mid_a))] + [(EXTRA, None, j) for j in range(len(mid_b))]
+    else:
+        mid = _myers(mid_a, mid_b)
+        if mid is None:
+            mid = _fallback(mid_a, mid_b)
+
+    ops = [(EQUAL, i, i) for i in range(pre)]
+    ops += [(tag, None if i is None else i + pre, None if j is None else j + pre) for tag, i, j in mid]
+    ops += [(EQUAL, n - suf + i, m - suf + i) for i in range(suf)]
+    return ops
+
+
+def _similarity(a, b):
+    """자모 단위 유사도 (받침 하나 틀린 것도 비슷한 단어로 봄)"""
+    ja = unicodedata.normalize('NFD', a)
+    jb = unicodedata.normalize('NFD', b)
+    if not ja or not jb:
+        return 0.0
+    ops = _myers(ja, jb, max_edits=len(ja) + len(jb))
+    same = sum(1 for tag, _, _ in ops if tag == EQUAL)
+    return 2.0 * same / (len(ja) + len(jb))
+
+
+def refine(user_word, correct_word):
+    """바뀐 단어를 글자 단위로 정렬: [(EQUAL|EXTRA|MISSING, 글자)]
+    틀린 글자는 사용자가 쓴 글자(EXTRA)로, 빠지기만 한 자리는 MISSING 으로 표시"""
+    if len(user_word) > MAX_REFINE_CHARS or len(correct_word) > MAX_REFINE_CHARS:
+        return [(EXTRA, user_word)]
+    ops = _myers(correct_word, user_word, max_edits=len(correct_word) + len(user_word))
+    parts = []
+    run_missing, run_extra = 0, []
+
+    def flush():
+        parts.extend((EXTRA, ch) for ch in run_extra)
+        if run_missing > len(run_extra):
+            parts.append((MISSING, ''))
+
+    for tag, i, j in ops:
+        if tag == EQUAL:
+            flush()
+            run_missing, run_extra = 0, []
+            parts.append((EQUAL, user_word[j]))
+        elif tag == MISSING:
+            run_missing += 1
+        else:
+            run_extra.append(user_word[j])
+    flush()
+    return parts
+
+
+def align(user_input, correct_text):
+    """단어 정렬 결과 [(tag, 정답 단어, 사용자 단어, 글자 정렬)]"""
+    correct = correct_tokens(correct_text)
+    user = normalize(user_input).split()
+    tail = user[MAX_USER_WORDS:]
+    user = user[:MAX_USER_WORDS]
+
+    ops = _align_words(correct, user)
+
+    result = []
+    missing, extra = [], []
+
+    def flush():
+        # 연속된 빠짐/추가 중 비슷한 단어끼리는 '바뀐 단어' 로 묶음
+        for k in range(max(len(missing), len(extra))):
+            c = missing[k] if k < len(missing) else None
+            u = extra[k] if k < len(extra) else None
+            if c is not None and u is not None and _similarity(u, c) >= CHANGED_SIMILARITY:
+                result.append((CHANGED, c, u, refine(u, c)))
+            else:
+                if c is not None:
+                    result.append((MISSING, c, None, None))
+                if u is not None:
+                    result.append((EXTRA, None, u, None))
+        missing.clear()
+        extra.clear()
+
+    for tag, i, j in ops:
+        if tag == MISSING:
+            missing.append(correct[i])
+        elif tag == EXTRA:
+            extra.append(user[j])
+        else:
+            if missing or extra:
+                flush()
+            result.append((EQUAL, correct[i], user[j], None))
+    flush()
+    result.extend((EXTRA, None, u, None) for u in tail)
+    return result
+
+
+def render(aligned):
+    """정렬 결과를 HTML 로 (빠진 단어 ˅, 더 쓴 단어 취소선, 바뀐 글자 빨간색)"""
+    out = []
+    for tag, c, u, parts in aligned:
+        if tag == EQUAL:
+            out.append(_escape(c))
+        elif tag == MISSING:
+            out.append(MISSING_MARK)
+        elif tag == EXTRA:
+            out.append(f"<span class='diff-extra'>{_escape(u)}</span>")
+        else:
+            chars = []
+            for ptag, ch in parts:
+                if ptag == EQUAL:
+                    chars.append(_escape(ch))
+                elif ptag == MISSING:
+                    chars.append(MISSING_MARK)
+                else:
+                    chars.append(f"<span class='diff-red'>{_escape(ch)}</span>")
+            out.append(f"<span class='diff-changed'>{''.join(chars)}</span>")
+    return ' '.join(out)
+
+
+def diff_strings(user_input, correct_text):
+    return render(align(user_input, correct_text))
@@ -0,0 +1,247 @@
+"""재실행/페이지/저장소 호출 계측
+
+프로세스 전체에서 Metrics 하나를 함께 쓴다.
+- 페이지 함수와 fragment 시간 (횟수, 합계, 최대, 최근 표본의 p50/p95)
+- 저장소 호출(read / write_many) 횟수와 시간 — TimedUserStore 로 감싸서
+- 세션별 재실행 횟수 (fragment 만 다시 실행한 것도 한 번)
+- 재실행마다 JSON 한 줄 로그 (logger 'bible.metrics', INFO)
+- 모든 수치의 스냅샷을 JSON 파일로 (path 를 주면 flush_interval 초마다, 종료할 때)
+- profile_rate 비율의 재실행을 cProfile 로 기록 (profile_dir 에 .prof 파일)
+"""
+import atexit
+import contextlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from storage import UserStore
+
+logger = logging.getLogger("bible.metrics")
+
+SAMPLES = 512          # 백분위 계산에 쓰는 최근 표본 수
+MAX_SESSIONS = 1000    # 재실행 횟수를 기억하는 세션 수
+
+
+class _Stat:
+    __slots__ = ('count', 'errors', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLES)
+
+    def add(self, ms, error):
+        self.count += 1
+        self.errors += error
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.samples.append(ms)
+
+    def snapshot(self):
+        s = sorted(self.samples)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total, 1),
+            'avg_ms': round(self.total / self.count, 2) if self.count else 0.0,
+            'p50_ms': round(s[len(s) // 2], 2) if s else 0.0,
+            'p95_ms': round(s[min(len(s) - 1, int(len(s) * 0.95))], 2) if s else 0.0,
+            'max_ms': round(self.max, 2),
+        }
+
+
+class Metrics:
+    def __init__(self, path=None, flush_interval=10.0, profile_rate=0.0, profile_dir="profiles",
+                 clock=time.perf_counter):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.profile_rate = profile_rate
+        self.profile_dir = profile_dir
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._reruns = {}
+        self._reruns_total = 0
+        self._sources = {}
+        self._local = threading.local()
+        self._started = time.time()
+        self._last_flush = clock()
+        if path:
+            atexit.register(self.flush)
+
+    # --- 측정 ---
+    def record(self, name, ms, error=False):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = _Stat()
+            stat.add(ms, error)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        t0 = self._clock()
+        error = False
+        try:
+            yield
+        except Exception:
+            # st.rerun() 등 Streamlit 흐름 제어는 Exception 이 아니므로 오류로 세지 않음
+            error = True
+            raise
+        finally:
+            self.record(name, (self._clock() - t0) * 1000, error)
+
+    @contextlib.contextmanager
+    def storage(self, op):
+        """저장소 호출 한 번 (지금 재실행의 호출 수에도 더함)"""
+        local = self._local
+        t0 = self._clock()
+        try:
+            with self.timer(f"storage.{op}"):
+                yield
+        finally:
+            local.storage_calls = getattr(local, 'storage_calls', 0) + 1
+            local.storage_ms = getattr(local, 'storage_ms', 0.0) + (self._clock() - t0) * 1000
+
+    @contextlib.contextmanager
+    def rerun(self, session, page):
+        """스크립트 재실행 한 번: 페이지 시간, 그동안의 저장소 호출, 세션별 횟수, 표본이면 cProfile
+
+        page 가 'fragment.이름' 이면 fragment 만 다시 실행한 것이다. fragment 가 전체 재실행 안에서
+        그려질 때는 (이미 재실행 중) 시간만 재고, 저장소 호출은 바깥 재실행에 센다.
+        """
+        local = self._local
+        name = page if page.startswith('fragment.') else f"page.{page}"
+        if getattr(local, 'page', None) is not None:
+            with self.timer(name):
+                yield
+            return
+        local.page = page
+        local.storage_calls = 0
+        local.storage_ms = 0.0
+        with self._lock:
+            count = self._reruns.pop(session, 0) + 1
+            self._reruns[session] = count  # 최근 세션이 뒤로 가도록 다시 넣음
+            if len(self._reruns) > MAX_SESSIONS:
+                del self._reruns[next(iter(self._reruns))]
+            self._reruns_total += 1
+
+        profiler = None
+        if self.profile_rate and random.random() < self.profile_rate:
+            import cProfile  # 켰을 때만 필요
+            profiler = cProfile.Profile()
+            profiler.enable()
+        t0 = self._clock()
+        try:
+            with self.timer(name):
+                yield
+        finally:
+            ms = (self._clock() - t0) * 1000
+            if profiler is not None:
+                profiler.disable()
+                self._dump_profile(profiler, session, count, page)
+            logger.info(json.dumps({
+                'event': 'rerun',
+                'session': session,
+                'rerun': count,
+                'page': page,
+                'ms': round(ms, 2),
+                'storage_calls': local.storage_calls,
+                'storage_ms': round(local.storage_ms, 2),
+                'profiled': profiler is not None,
+            }, ensure_ascii=False))
+            # 재실행 밖(다음 재실행 전)의 호출이 다음 재실행에 섞이지 않도록
+            local.page = None
+            local.storage_calls = 0
+            local.storage_ms = 0.0
+            self._maybe_flush()
+
+    def _dump_profile(self, profiler, session, count, page):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{session}-{count}-{page}.prof"
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+        except OSError as e:
+            logger.warning("프로파일 저장 실패: %s", e)
+
+    # --- 내보내기 ---
+    def add_source(self, name, stats_fn):
+        """스냅샷에 함께 넣을 다른 수치 (예: 저장소/저장 대기열의 stats)"""
+        self._sources[name] = stats_fn
+
+    def snapshot(self):
+        with self._lock:
+            timers = {name: stat.snapshot() for name, stat in sorted(self._stats.items())}
+            reruns = dict(self._reruns)
+            total = self._reruns_total
+        sources = {}
+        for name, fn in list(self._sources.items()):
+            try:
+                sources[name] = fn()
+            except Exception as e:
+                sources[name] = {'error': str(e)}
+        return {
+            'time': time.time(),
+            'uptime_s': round(time.time() - self._started, 1),
+            'reruns_total': total,
+            'sessions': len(reruns),
+            'reruns_per_session': reruns,
+            'timers': timers,
+            **sources,
+        }
+
+    def _maybe_flush(self):
+        if self.path and self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """스냅샷을 파일로 (임시 파일에 쓰고 바꿔치기)"""
+        if not self.path:
+            return
+        self._last_flush = self._clock()
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("계측 파일 저장 실패: %s", e)
+
+
+class TimedUserStore(UserStore):
+    """저장소 호출마다 횟수와 시간을 Metrics 에 기록"""
+
+    def __init__(self, store, metrics):
+        self._store = store
+        self._metrics = metrics
+
+    def read(self, nickname):
+        with self._metrics.storage('read'):
+            return self._store.read(nickname)
+
+    def read_or_stale(self, nickname):
+        with self._metrics.storage('read'):
+            return self._store.read_or_stale(nickname)
+
+    def write_many(self, items):
+        with self._metrics.storage('write_many'):
+            return self._store.write_many(items)
+
+    def append_attempts(self, attempts):
+        with self._metrics.storage('append_attempts'):
+            return self._store.append_attempts(attempts)
+
+    def read_attempts(self):
+        with self._metrics.storage('read_attempts'):
+            return self._store.read_attempts()
+
+    def stats(self):
+        return self._store.stats()
+
+    def close(self):
+        self._store.close()
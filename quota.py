@@ -0,0 +1,228 @@
+"""저장소 요청 조절 (여러 세션이 함께 쓰는 한 프로세스 기준)
+
+반 전체가 한꺼번에 입장하면 세션마다 같은 사용자를 따로 읽고, 구글 시트 사용량 제한
+(서비스 계정 하나에 분당 읽기 60, 쓰기 60)에 걸리면 429 오류가 난다.
+- SingleFlight: 같은 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받음
+- TokenBucket: 초당 rate 개, 최대 burst 개까지 몰아서 보냄 (넘으면 기다림)
+- QuotaUserStore: 위 둘을 저장소에 씌우고, 사용량 오류는 지터를 넣은 지수 백오프로 재시도.
+  끝내 읽지 못하면 예전에 읽어 둔 값을 stale 표시와 함께 돌려줌
+"""
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from storage import UserStore
+
+logger = logging.getLogger(__name__)
+
+# 분당 60 요청 제한 안에 들도록: burst 6 + 초당 0.9 × 60초 = 60
+READ_RATE = 0.9
+WRITE_RATE = 0.9
+BURST = 6
+# 토큰을 기다리는 최대 시간 (읽기는 사용자가 기다리는 중, 쓰기는 백그라운드)
+READ_WAIT = 20.0
+WRITE_WAIT = 30.0
+MAX_RETRIES = 4
+BACKOFF = 1.0
+MAX_BACKOFF = 16.0
+CACHE_SIZE = 2000      # 읽어 둔 사용자 수 (사용량 오류 때 대신 보여줄 값)
+
+_MISSING = object()
+
+
+class QuotaExceeded(Exception):
+    """정해진 시간 안에 요청을 보낼 차례가 오지 않음"""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+        self.acquired = 0
+        self.waits = 0
+        self.wait_s = 0.0
+        self.rejected = 0
+
+    def acquire(self, timeout=None):
+        """토큰 하나를 얻음 (timeout 초 안에 차례가 오지 않으면 False)"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                self.rejected += 1
+                return False
+            # 미리 가져감: 음수가 되면 뒤에 온 요청은 그만큼 더 기다림 (온 순서대로)
+            self._tokens -= 1
+            self.acquired += 1
+            if wait:
+                self.waits += 1
+                self.wait_s += wait
+        if wait:
+            self._sleep(wait)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_s': round(self.wait_s, 2),
+                'rejected': self.rejected,
+            }
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """key 가 같은 호출이 진행 중이면 그 결과(또는 오류)를 함께 받음"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class QuotaUserStore(UserStore):
+    """같은 읽기는 하나로 합치고, 속도를 제한하고, 사용량 오류는 재시도하는 저장소
+
+    retryable(e) 가 True 인 오류(시트의 429 등)만 재시도한다.
+    """
+
+    def __init__(self, store, retryable, read_rate=READ_RATE, write_rate=WRITE_RATE, burst=BURST,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF, cache_size=CACHE_SIZE, sleep=time.sleep):
+        self._store = store
+        self._retryable = retryable
+        self._reads = TokenBucket(read_rate, burst, sleep=sleep)
+        self._writes = TokenBucket(write_rate, burst, sleep=sleep)
+        self._flight = SingleFlight()
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._sleep = sleep
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._cache = OrderedDict()  # 닉네임 → 마지막으로 읽은(또는 쓴) 값
+
+        self.quota_errors = 0
+        self.retries = 0
+        self.stale_reads = 0
+        self.failures = 0
+
+    def _call(self, bucket, wait, fn):
+        """차례를 기다려 fn() 실행. 사용량 오류는 지터를 넣은 지수 백오프로 재시도"""
+        for attempt in range(self._max_retries + 1):
+            if not bucket.acquire(wait):
+                raise QuotaExceeded("요청이 많아 잠시 후 다시 시도해야 합니다")
+            try:
+                return fn()
+            except Exception as e:
+                if not self._retryable(e):
+                    raise
+                self.quota_errors += 1
+                if attempt == self._max_retries:
+                    raise
+                self.retries += 1
+                # full jitter: 한꺼번에 실패한 요청들이 같은 순간에 다시 몰리지 않도록
+                delay = random.uniform(0, min(MAX_BACKOFF, self._backoff * (2 ** attempt)))
+                logger.warning("저장소 사용량 제한, 재시도 %d/%d (%.1f초 후): %s",
+                               attempt + 1, self._max_retries, delay, e)
+                self._sleep(delay)
+
+    def _remember(self, nickname, record):
+        with self._cache_lock:
+            self._cache[nickname] = record
+            self._cache.move_to_end(nickname)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def read_or_stale(self, nickname):
+        try:
+            record = self._flight.do(('read', nickname),
+                                     lambda: self._call(self._reads, READ_WAIT, lambda: self._store.read(nickname)))
+        except Exception as e:
+            with self._cache_lock:
+                cached = self._cache.get(nickname, _MISSING)
+            if cached is _MISSING:
+                self.failures += 1
+                raise
+            self.stale_reads += 1
+            logger.warning("저장소를 읽지 못해 예전 값 사용 (%s): %s", nickname, e)
+            return (None if cached is None else dict(cached)), True
+        self._remember(nickname, record)
+        return (None if record is None else dict(record)), False
+
+    def read(self, nickname):
+        return self.read_or_stale(nickname)[0]
+
+    def write_many(self, items):
+        self._call(self._writes, WRITE_WAIT, lambda: self._store.write_many(items))
+        # 다음에 읽지 못할 때 보여줄 값도 방금 쓴 값으로
+        with self._cache_lock:
+            for nickname, fields in items.items():
+                if nickname in self._cache:
+                    self._cache[nickname] = {**(self._cache[nickname] or {}), **fields}
+
+    def append_attempts(self, attempts):
+        self._call(self._writes, WRITE_WAIT, lambda: self._store.append_attempts(attempts))
+
+    def read_attempts(self):
+        return self._flight.do(('attempts',),
+                               lambda: self._call(self._reads, READ_WAIT, self._store.read_attempts))
+
+    def stats(self):
+        with self._cache_lock:
+            cached = len(self._cache)
+        return {
+            **self._store.stats(),
+            'reads_shared': self._flight.shared,
+            'read_bucket': self._reads.stats(),
+            'write_bucket': self._writes.stats(),
+            'quota_errors': self.quota_errors,
+            'quota_retries': self.retries,
+            'stale_reads': self.stale_reads,
+            'read_failures': self.failures,
+            'cached_users': cached,
+        }
+
+    def close(self):
+        self._store.close()
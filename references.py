@@ -0,0 +1,171 @@
+"""장절 파서
+
+"창세기1:26", "창 1:26", "Gen 1:26", "창세기 1장 26절" 을 모두 같은 (책, 장, 절) 로 읽는다.
+책 이름과 약어는 모듈을 읽을 때 한 번 접두사 트리로 만들어 두고, 입력을 한 글자씩 따라가며
+가장 긴 책 이름을 찾는다.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# (개역개정 이름, 다른 이름/약어...)
+BOOKS = (
+    ("창세기", "창", "Genesis", "Gen", "Ge", "Gn"),
+    ("출애굽기", "출", "Exodus", "Exod", "Exo", "Ex"),
+    ("레위기", "레", "Leviticus", "Lev", "Le", "Lv"),
+    ("민수기", "민", "Numbers", "Num", "Nu", "Nm"),
+    ("신명기", "신", "Deuteronomy", "Deut", "Deu", "Dt"),
+    ("여호수아", "수", "Joshua", "Josh", "Jos"),
+    ("사사기", "삿", "Judges", "Judg", "Jdg"),
+    ("룻기", "룻", "Ruth", "Ru"),
+    ("사무엘상", "삼상", "1Samuel", "1Sam", "1Sa"),
+    ("사무엘하", "삼하", "2Samuel", "2Sam", "2Sa"),
+    ("열왕기상", "왕상", "1Kings", "1Kgs", "1Ki"),
+    ("열왕기하", "왕하", "2Kings", "2Kgs", "2Ki"),
+    ("역대상", "대상", "1Chronicles", "1Chron", "1Chr", "1Ch"),
+    ("역대하", "대하", "2Chronicles", "2Chron", "2Chr", "2Ch"),
+    ("에스라", "스", "Ezra", "Ezr"),
+    ("느헤미야", "느", "Nehemiah", "Neh", "Ne"),
+    ("에스더", "에", "Esther", "Esth", "Est"),
+    ("욥기", "욥", "Job", "Jb"),
+    ("시편", "시", "Psalms", "Psalm", "Psa", "Ps"),
+    ("잠언", "잠", "Proverbs", "Prov", "Pro", "Pr"),
+    ("전도서", "전", "Ecclesiastes", "Eccl", "Ecc", "Ec"),
+    ("아가", "아가서", "아", "SongofSongs", "SongofSolomon", "Song", "Sos"),
+    ("이사야", "사", "Isaiah", "Isa", "Is"),
+    ("예레미야", "렘", "Jeremiah", "Jer", "Je"),
+    ("예레미야애가", "애", "Lamentations", "Lam", "La"),
+    ("에스겔", "겔", "Ezekiel", "Ezek", "Eze", "Ezk"),
+    ("다니엘", "단", "Daniel", "Dan", "Da", "Dn"),
+    ("호세아", "호", "Hosea", "Hos", "Ho"),
+    ("요엘", "욜", "Joel", "Jl"),
+    ("아모스", "암", "Amos", "Am"),
+    ("오바댜", "옵", "Obadiah", "Obad", "Ob"),
+    ("요나", "욘", "Jonah", "Jon"),
+    ("미가", "미", "Micah", "Mic", "Mi"),
+    ("나훔", "나", "Nahum", "Nah", "Na"),
+    ("하박국", "합", "Habakkuk", "Hab", "Hb"),
+    ("스바냐", "습", "Zephaniah", "Zeph", "Zep"),
+    ("학개", "학", "Haggai", "Hag", "Hg"),
+    ("스가랴", "슥", "Zechariah", "Zech", "Zec"),
+    ("말라기", "말", "Malachi", "Mal", "Ml"),
+    ("마태복음", "마", "마태", "Matthew", "Matt", "Mat", "Mt"),
+    ("마가복음", "막", "마가", "Mark", "Mrk", "Mk"),
+    ("누가복음", "눅", "누가", "Luke", "Luk", "Lk"),
+    ("요한복음", "요", "Johannes", "John", "Jhn", "Jn"),
+    ("사도행전", "행", "Acts", "Act", "Ac"),
+    ("로마서", "롬", "Romans", "Rom", "Ro", "Rm"),
+    ("고린도전서", "고전", "1Corinthians", "1Cor", "1Co"),
+    ("고린도후서", "고후", "2Corinthians", "2Cor", "2Co"),
+    ("갈라디아서", "갈", "Galatians", "Gal", "Ga"),
+    ("에베소서", "엡", "Ephesians", "Eph", "Ep"),
+    ("빌립보서", "빌", "Philippians", "Phil", "Php"),
+    ("골로새서", "골", "Colossians", "Col"),
+    ("데살로니가전서", "살전", "1Thessalonians", "1Thess", "1Thes", "1Th"),
+    ("데살로니가후서", "살후", "2Thessalonians", "2Thess", "2Thes", "2Th"),
+    ("디모데전서", "딤전", "1Timothy", "1Tim", "1Ti"),
+    ("디모데후서", "딤후", "2Timothy", "2Tim", "2Ti"),
+    ("디도서", "딛", "Titus", "Tit"),
+    ("빌레몬서", "몬", "Philemon", "Philem", "Phlm", "Phm"),
+    ("히브리서", "히", "Hebrews", "Heb"),
+    ("야고보서", "약", "James", "Jas", "Jm"),
+    ("베드로전서", "벧전", "1Peter", "1Pet", "1Pe"),
+    ("베드로후서", "벧후", "2Peter", "2Pet", "2Pe"),
+    ("요한일서", "요일", "1John", "1Jn", "1Jo"),
+    ("요한이서", "요이", "2John", "2Jn", "2Jo"),
+    ("요한삼서", "요삼", "3John", "3Jn", "3Jo"),
+    ("유다서", "유", "Jude", "Jud"),
+    ("요한계시록", "계", "계시록", "Revelation", "Rev", "Re"),
+)
+
+BOOK_NAMES = tuple(names[0] for names in BOOKS)
+
+
+class Reference(NamedTuple):
+    book: int            # 1 ~ 66
+    chapter: int
+    verse: Optional[int]
+    verse_end: Optional[int]
+
+    @property
+    def book_name(self):
+        return BOOK_NAMES[self.book - 1]
+
+    def __str__(self):
+        if self.verse is None:
+            return f"{self.book_name} {self.chapter}"
+        if self.verse_end and self.verse_end != self.verse:
+            return f"{self.book_name} {self.chapter}:{self.verse}-{self.verse_end}"
+        return f"{self.book_name} {self.chapter}:{self.verse}"
+
+
+# 공백 제거 + 소문자 + 전각/구분 문자 정리
+_STRIP = str.maketrans({' ': None, '\t': None, '　': None, '：': ':', '～': '~', '－': '-', '–': '-'})
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text).lower().translate(_STRIP)
+
+
+# --- 책 이름 접두사 트리 ---
+_END = ''
+
+
+def _build_trie():
+    root = {}
+    for book, names in enumerate(BOOKS, start=1):
+        for name in names:
+            node = root
+            for ch in normalize(name):
+                node = node.setdefault(ch, {})
+            node[_END] = book
+    return root
+
+
+_TRIE = _build_trie()
+
+
+def match_book(text):
+    """정규화된 text 앞부분에서 가장 긴 책 이름 → (책 번호, 남은 문자열). 없으면 (None, text)"""
+    node = _TRIE
+    best = (None, text)
+    for i, ch in enumerate(text):
+        node = node.get(ch)
+        if node is None:
+            break
+        rest = text[i + 1:]
+        # 책 이름 다음에는 장 번호가 와야 함 ("요일" 을 "요" + "일" 로 읽지 않도록)
+        if _END in node and (not rest or rest[0].isdigit() or rest[0] == '.'):
+            best = (node[_END], rest)
+    return best
+
+
+_CHAPTER_VERSE = re.compile(r'^(\d+)(?:(?::|장|편)(?:(\d+)절?(?:[-~](\d+)절?)?)?)?$')
+
+
+@lru_cache(maxsize=4096)
+def parse_reference(text):
+    """장절 문자열 → Reference. 읽을 수 없으면 None"""
+    norm = normalize(text)
+    book, rest = match_book(norm)
+    if book is None:
+        return None
+    # "Gen. 1.26" 처럼 마침표를 쓴 경우
+    m = _CHAPTER_VERSE.match(rest.lstrip('.').replace('.', ':'))
+    if not m:
+        return None
+    chapter, verse, end = m.groups()
+    verse = int(verse) if verse else None
+    end = int(end) if end else verse
+    return Reference(book, int(chapter), verse, end)
+
+
+def addresses_match(user_addr, real_addr):
+    """사용자가 쓴 장절이 정답과 같은지 (책 이름/약어/띄어쓰기가 달라도 같은 곳이면 정답)"""
+    user_ref = parse_reference(user_addr)
+    real_ref = parse_reference(real_addr)
+    if user_ref is not None and real_ref is not None:
+        return user_ref == real_ref
+    return normalize(user_addr) == normalize(real_addr)
+
@@ -0,0 +1,172 @@
+"""간격 반복(SM-2) 복습 일정
+
+말씀마다 복습 상태(쉬움 정도, 간격, 다음 복습일)를 두고, 다음 복습일 순서의 힙에서
+다음에 볼 말씀을 꺼낸다. 이미 잘 외운 말씀은 뒤로 미뤄지고 틀린 말씀은 다음 날 다시 나온다.
+
+날짜는 date.toordinal() 정수(일 단위)로 다룬다.
+"""
+import datetime
+import heapq
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# 암송 결과 → SM-2 점수 (0 ~ 5, 3 미만이면 다시 처음부터)
+QUALITY_REVEALED = 0   # 정답보기
+QUALITY_WRONG = 1
+
+
+def quality_for(correct, hint_level):
+    """맞았으면 남은 힌트가 많을수록 높은 점수 (힌트 3개 그대로 → 5)"""
+    if not correct:
+        return QUALITY_WRONG
+    return 2 + max(1, min(hint_level, 3))
+
+
+def today():
+    return datetime.date.today().toordinal()
+
+
+class ReviewState:
+    """말씀 하나의 복습 상태"""
+    __slots__ = ('reps', 'lapses', 'ease', 'interval', 'due')
+
+    def __init__(self, reps=0, lapses=0, ease=DEFAULT_EASE, interval=0, due=0):
+        self.reps = reps
+        self.lapses = lapses
+        self.ease = ease
+        self.interval = interval
+        self.due = due
+
+    def review(self, quality, day):
+        """SM-2 갱신"""
+        if quality < 3:
+            self.reps = 0
+            self.lapses += 1
+            self.interval = 1
+        else:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = 1
+            elif self.reps == 2:
+                self.interval = 6
+            else:
+                self.interval = max(1, round(self.interval * self.ease))
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due = day + self.interval
+
+    def __repr__(self):
+        return f"ReviewState(reps={self.reps}, ease={self.ease:.2f}, interval={self.interval}, due={self.due})"
+
+
+# --- 저장 형식: "번호.reps.lapses.ease(x100).간격.복습일" 을 ',' 로 연결 (숫자는 36진수) ---
+def _b36(n):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    if n == 0:
+        return '0'
+    out = []
+    while n:
+        n, r = divmod(n, 36)
+        out.append(digits[r])
+    return ''.join(reversed(out))
+
+
+def encode_states(states):
+    return ','.join(
+        '.'.join(_b36(x) for x in (vid, s.reps, s.lapses, round(s.ease * 100), s.interval, s.due))
+        for vid, s in states.items()
+    )
+
+
+def decode_states(text):
+    states = {}
+    for item in (text or '').split(','):
+        parts = item.split('.')
+        if len(parts) != 6:
+            continue
+        try:
+            vid, reps, lapses, ease, interval, due = (int(p, 36) for p in parts)
+        except ValueError:
+            continue
+        states[vid] = ReviewState(reps, lapses, ease / 100, interval, due)
+    return states
+
+
+def _smallest(heap, stale, skip, below=None):
+    """힙에서 stale 도 skip 도 아닌 가장 작은 항목 (below 를 주면 그보다 작은 것만, 없으면 None)
+
+    맨 위의 낡은 항목은 버리고(다시 쓰이지 않음), 건너뛸 항목은 꺼내지 않고 그 아래 자식들을
+    작은 것부터 본다. 건너뛴 항목이 k 개면 O((k + 1) log (k + 1)) 이고 힙은 그대로 남는다.
+    """
+    while heap and stale(heap[0]):
+        heapq.heappop(heap)
+    frontier = [(heap[0], 0)] if heap else []
+    while frontier:
+        entry, i = heapq.heappop(frontier)
+        if below is not None and entry >= below:
+            # 힙이므로 자식들은 더 큼
+            return None
+        if not stale(entry) and not skip(entry):
+            return entry
+        for child in (2 * i + 1, 2 * i + 2):
+            if child < len(heap):
+                heapq.heappush(frontier, (heap[child], child))
+    return None
+
+
+class Scheduler:
+    """한 사용자의 복습 일정
+
+    states 는 {번호: ReviewState} (그대로 갱신됨), order 는 새 말씀을 소개할 순서.
+    복습 힙에는 (복습일, 순서, 번호) 가 들어 있고, 상태가 바뀌면 새 항목을 넣고 옛 항목은 꺼낼 때 버린다.
+    새 말씀 힙에는 아직 보지 않은 말씀의 순서가 들어 있고, 본 말씀은 꺼낼 때 버린다.
+    take() 로 낸 말씀(asked)도 다시 고르지 않으므로 두 힙에서 꺼낼 때 버린다.
+    """
+
+    def __init__(self, states, order):
+        self.states = states
+        self._order = order
+        self._rank = {vid: i for i, vid in enumerate(order)}
+        self._heap = [(s.due, self._rank[vid], vid) for vid, s in states.items() if vid in self._rank]
+        heapq.heapify(self._heap)
+        # 순서대로 만들었으므로 이미 힙
+        self._new = [i for i, vid in enumerate(order) if vid not in states]
+        self.asked = set()
+
+    def next_verse(self, day, exclude=()):
+        """다음에 볼 말씀 번호: 복습할 때가 된 말씀 → 새 말씀 → 가장 빨리 돌아오는 말씀. 없으면 None
+
+        낡은 항목과 이미 낸 말씀의 항목은 꺼내서 버리므로 항목마다 한 번 O(log n) (상각).
+        exclude 의 말씀은 힙에서 꺼내지 않고 건너뛰므로, 건너뛴 말씀이 k 개면 O((k + 1) log (k + 1)) 이 더 든다.
+        """
+        order = self._order
+        asked = self.asked
+        stale = lambda e: e[2] in asked or self.states[e[2]].due != e[0]
+        skip = lambda e: e[2] in exclude
+        # (복습일, ...) < (day + 1,) 이면 복습일 <= day
+        due = _smallest(self._heap, stale, skip, below=(day + 1,))
+        if due is not None:
+            return due[2]
+        new = _smallest(self._new, lambda i: order[i] in self.states or order[i] in asked,
+                        lambda i: order[i] in exclude)
+        if new is not None:
+            return order[new]
+        due = _smallest(self._heap, stale, skip)
+        return due[2] if due is not None else None
+
+    def take(self, day):
+        """다음에 낼 말씀 번호 (next_verse). 이번에 낸 것으로 표시해 다시 고르지 않음. 없으면 None"""
+        verse_id = self.next_verse(day)
+        if verse_id is not None:
+            self.asked.add(verse_id)
+        return verse_id
+
+    def review(self, verse_id, quality, day):
+        state = self.states.get(verse_id)
+        if state is None:
+            state = self.states[verse_id] = ReviewState()
+        old_due = state.due
+        state.review(quality, day)
+        if verse_id in self._rank and state.due != old_due:
+            heapq.heappush(self._heap, (state.due, self._rank[verse_id], verse_id))
+        return state
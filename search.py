@@ -0,0 +1,125 @@
+"""말씀 검색 (한글 2-gram / 3-gram 역색인)
+
+말씀 목록을 한 번 훑어서 내용과 장절의 글자 2개/3개 묶음마다 그 묶음이 들어 있는 말씀
+목록을 만들어 둔다. 목록의 말씀은 짧은 말씀부터 번호를 다시 매겨 두어서, 검색할 때는
+가장 짧은 목록을 앞에서부터 보며 나머지 목록에도 있는 말씀을 필요한 만큼만 모으고 멈춘다.
+띄어쓰기와 문장 부호는 무시한다.
+
+"요 3:16", "창세기 1장" 처럼 장절로 읽히는 검색어는 장절 표에서 바로 찾는다.
+"""
+import bisect
+import re
+import unicodedata
+from array import array
+
+from references import parse_reference
+
+_EMPTY = array('I')
+_STRIP = re.compile(r'[\W_]+')
+# 모든 묶음이 들어 있는 말씀을 결과 수의 몇 배까지 모아서 순위를 매길지
+CANDIDATE_FACTOR = 3
+# 모든 묶음이 들어 있는 말씀이 없을 때(오타 등) 일부만 맞는 말씀을 찾으면서 훑는 최대 항목 수
+MAX_PARTIAL_SCAN = 5000
+
+
+def clean(text):
+    """검색용 정규화: NFKC + 소문자 + 공백/문장 부호 제거"""
+    return _STRIP.sub('', unicodedata.normalize('NFKC', text).lower())
+
+
+def _grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _contains(postings, rank):
+    i = bisect.bisect_left(postings, rank)
+    return i < len(postings) and postings[i] == rank
+
+
+class SearchIndex:
+    def __init__(self, corpus):
+        texts = []
+        addrs = []
+        refs = {}
+        for pos in range(len(corpus)):
+            verse = corpus.at(pos)
+            texts.append(clean(verse.content))
+            addrs.append(clean(verse.address))
+            ref = verse.ref
+            if ref is not None:
+                refs.setdefault((ref.book, ref.chapter), []).append(pos)
+                for v in range(ref.verse or 0, (ref.verse_end or ref.verse or 0) + 1):
+                    refs.setdefault((ref.book, ref.chapter, v), []).append(pos)
+
+        # 짧은 말씀부터 순번을 매기고 (같은 길이면 파일 순서), 그 순서로 넣어서 목록이 정렬된 채로 쌓이게 함
+        order = sorted(range(len(texts)), key=lambda p: (len(texts[p]), p))
+        grams = {}
+        for r, pos in enumerate(order):
+            text, addr = texts[pos], addrs[pos]
+            keys = _grams(text, 2) | _grams(text, 3) | _grams(addr, 2) | _grams(addr, 3)
+            for key in keys:
+                postings = grams.get(key)
+                if postings is None:
+                    grams[key] = postings = array('I')
+                postings.append(r)
+
+        self._postings = grams
+        self._order = array('I', order)
+        self._refs = refs
+        self._texts = texts
+
+    def __len__(self):
+        return len(self._texts)
+
+    def nbytes(self):
+        """색인이 차지하는 메모리 어림값 (목록 + 정규화한 본문)"""
+        postings = sum(64 + len(key) * 2 + p.itemsize * len(p) for key, p in self._postings.items())
+        texts = sum(50 + len(t) * 2 for t in self._texts)
+        return postings + texts + self._order.itemsize * len(self._order)
+
+    def search(self, query, limit=20):
+        """검색어 → 말씀 위치(파일 순서 = 전체보기에서의 순번) 목록, 잘 맞는 것부터"""
+        ref = parse_reference(query)
+        if ref is not None:
+            key = (ref.book, ref.chapter) if ref.verse is None else (ref.book, ref.chapter, ref.verse)
+            hits = self._refs.get(key)
+            if hits:
+                return hits[:limit]
+
+        q = clean(query)
+        if len(q) < 2:
+            return []
+        lists = sorted((self._postings.get(g, _EMPTY) for g in _grams(q, 3 if len(q) >= 3 else 2)), key=len)
+
+        # 모든 묶음이 들어 있는 말씀: 가장 짧은 목록을 짧은 말씀부터 보며 필요한 만큼만
+        first, rest = lists[0], lists[1:]
+        want = limit * CANDIDATE_FACTOR
+        matches = []
+        for r in first:
+            if all(_contains(postings, r) for postings in rest):
+                matches.append(self._order[r])
+                if len(matches) >= want:
+                    break
+        if matches:
+            texts = self._texts
+            # 검색어가 그대로 들어 있는 말씀 → 짧은 말씀 → 앞쪽 말씀
+            matches.sort(key=lambda p: (q not in texts[p], len(texts[p]), p))
+            return matches[:limit]
+        return self._partial(lists, limit)
+
+    def _partial(self, lists, limit):
+        """묶음이 많이 맞는 말씀부터 (드문 묶음의 목록만 훑음)"""
+        counts = {}
+        scanned = 0
+        for postings in lists:
+            if not postings:
+                continue
+            if scanned + len(postings) > MAX_PARTIAL_SCAN:
+                break
+            scanned += len(postings)
+            for r in postings:
+                counts[r] = counts.get(r, 0) + 1
+        # 묶음 하나만 겹친 말씀은 결과로 보지 않음 (검색어가 짧으면 예외)
+        need = min(2, len(lists))
+        ranked = sorted((r for r, c in counts.items() if c >= need), key=lambda r: (-counts[r], r))
+        return [self._order[r] for r in ranked[:limit]]
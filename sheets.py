@@ -0,0 +1,515 @@
+"""구글 시트 연결 관리
+
+Streamlit 은 버튼을 누를 때마다 스크립트를 다시 실행하므로, 매번 인증을 새로 하면
+로그인/하트 한 번마다 OAuth 핸드셰이크 비용을 치르게 된다.
+여기서는 프로세스 전체에서 하나의 인증된 클라이언트와 bible_db 핸들을 재사용한다.
+
+사용자는 닉네임 해시로 users_00 ~ users_15 워크시트에 나누어 저장한다 (스키마 버전 2).
+예전 형식(sheet1 의 Nickname, SavedVerses, Review — 버전 1)에만 있는 사용자는 처음 읽거나
+쓸 때 자기 샤드로 옮겨지고, 한꺼번에 옮기려면 python sheets.py migrate 를 실행한다.
+"""
+import hashlib
+import sys
+import threading
+import time
+
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+from storage import ATTEMPT_FIELDS, FIELDS, UserStore
+
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+DB_NAME = "bible_db"
+
+# 서비스 계정 토큰은 1시간 동안 유효 → 만료 5분 전에 미리 다시 인증
+TOKEN_LIFETIME = 3600
+REFRESH_MARGIN = 300
+
+# 닉네임 인덱스: TTL 이 지나면 새로 추가된 행만 가져오고, 오래되면 전체를 다시 읽음
+INDEX_TTL = 60
+INDEX_REBUILD_AFTER = 600
+
+# 샤드: 배포 후에는 개수를 바꾸면 안 됨 (사용자가 다른 샤드로 계산됨)
+SHARD_COUNT = 16
+SHARD_PREFIX = "users_"
+SCHEMA_VERSION = 2
+SHARD_HEADER = ('Nickname', 'Schema') + FIELDS
+
+# 암송 기록 (덧붙이기만 함)
+ATTEMPT_SHEET = "attempts"
+
+
+def shard_of(nickname, shards=SHARD_COUNT):
+    """닉네임 → 샤드 번호 (프로세스/재시작과 관계없이 항상 같음)"""
+    digest = hashlib.blake2b(nickname.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+
+def shard_title(shard):
+    return f"{SHARD_PREFIX}{shard:02d}"
+
+
+def _column(index):
+    """0부터 시작하는 열 번호 → 열 이름 (A, B, ... Z, AA ...)"""
+    name = ''
+    index += 1
+    while index:
+        index, r = divmod(index - 1, 26)
+        name = chr(ord('A') + r) + name
+    return name
+
+
+def is_auth_error(e):
+    """토큰 만료/무효로 인한 오류인지 확인"""
+    if isinstance(e, gspread.exceptions.APIError):
+        response = getattr(e, 'response', None)
+        return getattr(response, 'status_code', None) == 401
+    # oauth2client / google-auth 의 토큰 갱신 실패
+    return type(e).__name__ in ('HttpAccessTokenRefreshError', 'AccessTokenRefreshError', 'RefreshError')
+
+
+def is_quota_error(e):
+    """사용량 제한(분당 요청 수)에 걸린 오류인지 확인"""
+    if isinstance(e, gspread.exceptions.APIError):
+        response = getattr(e, 'response', None)
+        return getattr(response, 'status_code', None) == 429
+    return False
+
+
+class SheetClientPool:
+    """인증된 gspread 클라이언트와 워크시트 핸들을 재사용하는 풀"""
+
+    def __init__(self, creds_dict, db_name=DB_NAME, clock=time.monotonic):
+        self._creds_dict = dict(creds_dict)
+        self._db_name = db_name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._client = None
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._authorized_at = 0.0
+
+        self.handshakes = 0
+        self.reused = 0
+        self.auth_errors = 0
+
+    def _authorize(self):
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(self._creds_dict, SCOPE)
+        self._client = gspread.authorize(creds)
+        self._spreadsheet = self._client.open(self._db_name)
+        self._worksheets = {}
+        self._authorized_at = self._clock()
+        self.handshakes += 1
+
+    def _expiring(self):
+        return self._clock() - self._authorized_at >= TOKEN_LIFETIME - REFRESH_MARGIN
+
+    def _ensure(self):
+        # 호출 측에서 self._lock 을 잡고 있어야 함
+        if self._spreadsheet is None or self._expiring():
+            self._authorize()
+        else:
+            self.reused += 1
+
+    def worksheet(self, title=None, header=None):
+        """캐시된 워크시트 핸들 (title 이 없으면 sheet1)
+
+        header 를 주면 워크시트가 없을 때 그 헤더로 새로 만든다.
+        """
+        with self._lock:
+            self._ensure()
+            ws = self._worksheets.get(title)
+            if ws is None:
+                if title is None:
+                    ws = self._spreadsheet.sheet1
+                else:
+                    try:
+                        ws = self._spreadsheet.worksheet(title)
+                    except gspread.exceptions.WorksheetNotFound:
+                        if header is None:
+                            raise
+                        ws = self._spreadsheet.add_worksheet(title=title, rows=1, cols=len(header))
+                        ws.append_row(list(header))
+                self._worksheets[title] = ws
+            return ws
+
+    def invalidate(self):
+        """다음 호출 때 클라이언트를 새로 만들도록 초기화"""
+        with self._lock:
+            self._client = None
+            self._spreadsheet = None
+            self._worksheets = {}
+
+    def run(self, fn):
+        """fn() 실행. 인증 오류가 나면 클라이언트를 다시 만들어 한 번 재시도"""
+        try:
+            return fn()
+        except Exception as e:
+            if not is_auth_error(e):
+                raise
+            self.auth_errors += 1
+            self.invalidate()
+            return fn()
+
+    def stats(self):
+        return {
+            'handshakes': self.handshakes,
+            'handshakes_avoided': self.reused,
+            'auth_errors': self.auth_errors,
+        }
+
+
+def _parse_attempt(row):
+    """시트의 문자열 한 줄 → 암송 기록 튜플 (읽을 수 없으면 None)"""
+    try:
+        # 묶음 열이 생기기 전의 줄은 기본 묶음('')
+        ts, nickname, verse, correct, hint, seconds, deck = (list(row) + [''])[:len(ATTEMPT_FIELDS)]
+        return (float(ts), nickname, int(verse), int(correct), int(hint), float(seconds), deck)
+    except ValueError:
+        return None
+
+
+class UserSheet:
+    """사용자 시트 (Nickname, SavedVerses, Review) 와 닉네임 → 행 번호 인덱스
+
+    로그인마다 get_all_records() 로 전체 표를 받지 않도록 닉네임 열만 캐시해 두고,
+    조회/저장은 해당 행 하나만 읽고 쓴다.
+    """
+
+    def __init__(self, pool, title=None, ttl=INDEX_TTL, rebuild_after=INDEX_REBUILD_AFTER, clock=time.monotonic):
+        self._pool = pool
+        self._title = title
+        self._ttl = ttl
+        self._rebuild_after = rebuild_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._last_row = 1  # 1행은 헤더
+        self._built_at = None
+        self._synced_at = None
+
+    def _worksheet(self):
+        return self._pool.worksheet(self._title)
+
+    # --- 인덱스 관리 (self._lock 안에서 호출) ---
+    def _rebuild(self):
+        names = self._worksheet().col_values(1)
+        rows = {}
+        for i, name in enumerate(names[1:], start=2):
+            if name:
+                rows.setdefault(name, i)
+        self._rows = rows
+        self._last_row = max(len(names), 1)
+        self._built_at = self._synced_at = self._clock()
+
+    def _refresh_tail(self):
+        """마지막으로 본 행 이후에 추가된 행만 가져옴"""
+        start = self._last_row + 1
+        values = self._worksheet().get(f"A{start}:A")
+        for i, row in enumerate(values, start=start):
+            if row and row[0]:
+                self._rows.setdefault(row[0], i)
+        self._last_row += len(values)
+        self._synced_at = self._clock()
+
+    def _sync(self):
+        """필요하면 인덱스를 갱신. 네트워크 요청을 했으면 True"""
+        now = self._clock()
+        if self._built_at is None or now - self._built_at >= self._rebuild_after:
+            self._rebuild()
+            return True
+        if now - self._synced_at >= self._ttl:
+            self._refresh_tail()
+            return True
+        return False
+
+    def row_of(self, nickname):
+        """닉네임의 행 번호 (없으면 None)"""
+        with self._lock:
+            fresh = self._sync()
+            row = self._rows.get(nickname)
+            if row is None and not fresh:
+                # 다른 프로세스가 방금 추가했을 수 있으므로 새 행만 확인
+                self._refresh_tail()
+                row = self._rows.get(nickname)
+            return row
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    def _checked_rows(self, nicknames):
+        """{닉네임: 행 번호} (없는 사용자는 빠짐) — 쓰기 전에 그 행들의 A열을 한 번에 읽어 확인
+
+        하나라도 다른 닉네임이면 (시트가 수동으로 정렬/편집됨) read() 처럼 전체 재구성 후 다시 찾는다.
+        """
+        rows = {}
+        for nickname in nicknames:
+            row = self.row_of(nickname)
+            if row is not None:
+                rows[nickname] = row
+        if not rows:
+            return rows
+        found = self._worksheet().batch_get([f"A{row}" for row in rows.values()])
+        if all(cells and cells[0] and cells[0][0] == nickname for nickname, cells in zip(rows, found)):
+            return rows
+        with self._lock:
+            self._rebuild()
+            return {n: self._rows[n] for n in nicknames if n in self._rows}
+
+    def _appended(self):
+        """새 행을 덧붙인 뒤 인덱스에 반영 (self._lock 안에서 호출)
+
+        다른 프로세스가 같은 사용자를 먼저 덧붙였을 수 있으므로 응답의 행 번호를 그대로 쓰지 않고
+        새 행들을 다시 읽어, _rebuild 와 같이 위쪽 행을 그 사용자의 행으로 삼는다.
+        """
+        if self._built_at is not None:
+            self._refresh_tail()
+
+    # --- 조회/저장 ---
+    def read(self, nickname):
+        """{필드: 문자열} (사용자가 없으면 None)"""
+        row = self.row_of(nickname)
+        if row is None:
+            return None
+        values = self._worksheet().row_values(row)
+        if not values or values[0] != nickname:
+            # 시트가 수동으로 정렬/편집됨 → 전체 재구성 후 다시 찾기
+            with self._lock:
+                self._rebuild()
+                row = self._rows.get(nickname)
+            if row is None:
+                return None
+            values = self._worksheet().row_values(row)
+        values = values[1:] + [""] * len(FIELDS)
+        return dict(zip(FIELDS, values))
+
+    def write(self, nickname, fields):
+        self.write_many({nickname: fields})
+
+    def write_many(self, items):
+        """여러 사용자의 필드를 batch_update 한 번 (+ 새 사용자는 append_rows 한 번) 으로 저장"""
+        updates, new = [], []
+        found = self._checked_rows(items)
+        for nickname, fields in items.items():
+            row = found.get(nickname)
+            if row is None:
+                new.append((nickname, fields))
+                continue
+            for field, value in fields.items():
+                col = chr(ord('B') + FIELDS.index(field))
+                updates.append({'range': f"{col}{row}", 'values': [[value]]})
+
+        sheet = self._worksheet()
+        if updates:
+            sheet.batch_update(updates)
+        if not new:
+            return
+
+        sheet.append_rows([[nickname] + [fields.get(f, "") for f in FIELDS] for nickname, fields in new])
+        with self._lock:
+            self._appended()
+
+
+class ShardSheet(UserSheet):
+    """샤드 워크시트 하나
+
+    닉네임 → 행 번호 인덱스는 UserSheet 와 같이 관리하고, 조회는 그 사용자의 행 하나만 읽는다.
+    샤드 전체(A:ZZ)는 인덱스를 처음 만들거나 다시 만들 때만 읽고, 그때 헤더도 확인한다.
+    열은 헤더 이름으로 찾으므로 나중에 열이 늘어도 예전 행을 그대로 읽는다.
+    Schema 열은 그 행을 마지막으로 쓴 형식의 버전.
+    """
+
+    def __init__(self, pool, title, ttl=INDEX_TTL, rebuild_after=INDEX_REBUILD_AFTER, clock=time.monotonic):
+        super().__init__(pool, title, ttl, rebuild_after, clock)
+        self._header = list(SHARD_HEADER)
+        self._write_lock = threading.Lock()  # 같은 새 사용자가 두 번 추가되지 않도록
+        self.fetches = 0      # 샤드 전체 읽기
+        self.row_reads = 0
+
+    def _worksheet(self):
+        return self._pool.worksheet(self._title, header=SHARD_HEADER)
+
+    # --- 인덱스 관리 (self._lock 안에서 호출) ---
+    def _rebuild(self):
+        """샤드 전체를 읽어 헤더를 확인하고 인덱스를 새로 만듦"""
+        sheet = self._worksheet()
+        values = sheet.get("A:ZZ")
+        self.fetches += 1
+        header = list(values[0]) if values and values[0] else list(SHARD_HEADER)
+        missing = [h for h in SHARD_HEADER if h not in header]
+        if missing:
+            # 예전 헤더에 없는 열은 오른쪽에 추가 (기존 행은 빈 값으로 읽힘)
+            header += missing
+            sheet.batch_update([{'range': f"A1:{_column(len(header) - 1)}1", 'values': [header]}])
+        rows = {}
+        for i, row in enumerate(values[1:], start=2):
+            if row and row[0]:
+                rows.setdefault(row[0], i)
+        self._header = header
+        self._rows = rows
+        self._last_row = max(len(values), 1)
+        self._built_at = self._synced_at = self._clock()
+
+    # --- 조회/저장 ---
+    def _row_values(self, row):
+        """행 하나의 셀 값 (A열부터 헤더의 마지막 열까지)"""
+        values = self._worksheet().get(f"A{row}:{_column(len(self._header) - 1)}{row}")
+        self.row_reads += 1
+        return list(values[0]) if values else []
+
+    def read(self, nickname):
+        """{필드: 문자열} (사용자가 없으면 None) — 그 사용자의 행만 읽음"""
+        row = self.row_of(nickname)
+        if row is None:
+            return None
+        values = self._row_values(row)
+        if not values or values[0] != nickname:
+            # 시트가 수동으로 정렬/편집됨 → 전체 재구성 후 다시 찾기
+            with self._lock:
+                self._rebuild()
+                row = self._rows.get(nickname)
+            if row is None:
+                return None
+            values = self._row_values(row)
+        header = self._header
+        record = {}
+        for field in FIELDS:
+            i = header.index(field)
+            record[field] = values[i] if i < len(values) else ""
+        return record
+
+    def has(self, nickname):
+        return self.row_of(nickname) is not None
+
+    def write_many(self, items):
+        """이미 있는 사용자는 batch_update 한 번 (Schema 도 함께 갱신), 새 사용자는 append_rows 한 번"""
+        with self._write_lock:
+            updates, new = [], []
+            found = self._checked_rows(items)
+            for nickname, fields in items.items():
+                row = found.get(nickname)
+                if row is None:
+                    new.append((nickname, fields))
+                    continue
+                header = self._header
+                for field, value in {**fields, 'Schema': str(SCHEMA_VERSION)}.items():
+                    updates.append({'range': f"{_column(header.index(field))}{row}", 'values': [[value]]})
+
+            sheet = self._worksheet()
+            if updates:
+                sheet.batch_update(updates)
+            if not new:
+                return
+
+            header = self._header
+            rows = []
+            for nickname, fields in new:
+                values = {'Nickname': nickname, 'Schema': str(SCHEMA_VERSION), **fields}
+                rows.append([values.get(h, "") for h in header])
+            sheet.append_rows(rows)
+            with self._lock:
+                self._appended()
+
+
+class SheetsUserStore(UserStore):
+    """구글 시트 저장소 (인증 오류가 나면 클라이언트를 다시 만들어 재시도)"""
+
+    def __init__(self, credentials, db_name=DB_NAME, shards=SHARD_COUNT):
+        self.pool = SheetClientPool(credentials, db_name)
+        self.legacy = UserSheet(self.pool)  # 버전 1 (sheet1)
+        self.shards = [ShardSheet(self.pool, shard_title(i)) for i in range(shards)]
+        self.migrated = 0
+
+    def _shard(self, nickname):
+        return self.shards[shard_of(nickname, len(self.shards))]
+
+    def _read(self, nickname):
+        shard = self._shard(nickname)
+        record = shard.read(nickname)
+        if record is None:
+            # 아직 옮기지 않은 사용자: 예전 시트에서 읽어 자기 샤드로 옮김
+            record = self.legacy.read(nickname)
+            if record is not None:
+                shard.write_many({nickname: record})
+                self.migrated += 1
+        return record
+
+    def _write_many(self, items):
+        groups = {}
+        for nickname, fields in items.items():
+            groups.setdefault(self._shard(nickname), {})[nickname] = fields
+        for shard, group in groups.items():
+            for nickname, fields in group.items():
+                if all(f in fields for f in FIELDS) or shard.has(nickname):
+                    continue
+                # 샤드에 처음 쓰는 사용자: 예전 시트의 나머지 필드를 함께 옮김
+                old = self.legacy.read(nickname)
+                if old is not None:
+                    group[nickname] = {**old, **fields}
+                    self.migrated += 1
+            shard.write_many(group)
+
+    def read(self, nickname):
+        return self.pool.run(lambda: self._read(nickname))
+
+    def write_many(self, items):
+        self.pool.run(lambda: self._write_many(items))
+
+    def _attempt_sheet(self):
+        return self.pool.worksheet(ATTEMPT_SHEET, header=ATTEMPT_FIELDS)
+
+    def append_attempts(self, attempts):
+        if attempts:
+            self.pool.run(lambda: self._attempt_sheet().append_rows([list(a) for a in attempts]))
+
+    def read_attempts(self):
+        values = self.pool.run(lambda: self._attempt_sheet().get_all_values())
+        attempts = (_parse_attempt(row) for row in values[1:] if len(row) >= len(ATTEMPT_FIELDS) - 1)
+        return [a for a in attempts if a is not None]
+
+    def migrate(self):
+        """예전 시트의 사용자를 모두 샤드로 옮김 (이미 있는 사용자는 건너뜀). 옮긴 수"""
+        def migrate():
+            values = self.pool.worksheet().get_all_values()
+            groups = {}
+            for row in values[1:]:
+                if not row or not row[0]:
+                    continue
+                cells = row[1:] + [""] * len(FIELDS)
+                groups.setdefault(self._shard(row[0]), {}).setdefault(row[0], dict(zip(FIELDS, cells)))
+            moved = 0
+            for shard, group in groups.items():
+                todo = {n: fields for n, fields in group.items() if not shard.has(n)}
+                if todo:
+                    shard.write_many(todo)
+                    moved += len(todo)
+            self.migrated += moved
+            return moved
+        return self.pool.run(migrate)
+
+    def stats(self):
+        return {
+            **self.pool.stats(),
+            'shard_fetches': sum(s.fetches for s in self.shards),
+            'shard_row_reads': sum(s.row_reads for s in self.shards),
+            'migrated': self.migrated,
+        }
+
+
+def main(argv):
+    """python sheets.py migrate [secrets.toml] — 예전 시트의 사용자를 모두 샤드로 옮김"""
+    if not argv or argv[0] != 'migrate':
+        print(main.__doc__)
+        return 2
+    import tomllib
+    path = argv[1] if len(argv) > 1 else ".streamlit/secrets.toml"
+    with open(path, 'rb') as f:
+        secrets = tomllib.load(f)
+    store = SheetsUserStore(secrets["gcp_service_account"])
+    print(f"{store.migrate()}명을 옮겼습니다.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,206 @@
+"""사용자 데이터 저장소
+
+저장소는 닉네임별 필드(SavedVerses, Review) 문자열을 읽고 쓰는 단순한 인터페이스와
+암송 기록(한 문제에 한 줄)을 덧붙이고 읽는 인터페이스를 가진다.
+- sheets: 구글 시트 (bible_db) — 운영 기본값
+- sqlite: 로컬 SQLite 파일 — 구글 인증 없이 실행/부하 테스트용
+"""
+import contextlib
+import queue
+import threading
+
+DEFAULT_BACKEND = "sheets"
+DEFAULT_SQLITE_PATH = "bible_db.sqlite3"
+
+# Nickname 다음에 오는 필드 (시트에서는 B, C 열)
+FIELDS = ('SavedVerses', 'Review')
+
+# 암송 기록 한 줄: (시각(epoch 초), 닉네임, 말씀 번호, 정답 1/0, 힌트 단계, 걸린 초, 말씀 묶음)
+# 묶음은 기본 묶음이면 '' (묶음이 생기기 전의 기록도 '')
+ATTEMPT_FIELDS = ('Time', 'Nickname', 'Verse', 'Correct', 'Hint', 'Seconds', 'Deck')
+
+
+class UserStore:
+    """저장소 인터페이스"""
+
+    def read(self, nickname):
+        """{필드: 문자열} (사용자가 없으면 None)"""
+        raise NotImplementedError
+
+    def read_or_stale(self, nickname):
+        """(read 결과, stale) — stale 이 True 면 저장소를 읽지 못해 예전에 읽어 둔 값"""
+        return self.read(nickname), False
+
+    def write_many(self, items):
+        """{닉네임: {필드: 문자열}} 을 한 번에 저장 (없는 필드는 그대로 둠)"""
+        raise NotImplementedError
+
+    def write(self, nickname, fields):
+        self.write_many({nickname: fields})
+
+    def append_attempts(self, attempts):
+        """암송 기록 여러 줄을 덧붙임"""
+        raise NotImplementedError
+
+    def read_attempts(self):
+        """지금까지의 암송 기록 전체 [(ATTEMPT_FIELDS 순서의 튜플)]"""
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class SqliteUserStore(UserStore):
+    """WAL 모드 SQLite 저장소 (연결 풀 + 고정 SQL 문으로 준비된 문장 재사용)"""
+
+    _COLUMNS = {'SavedVerses': 'saved_verses', 'Review': 'review'}
+    _SELECT = "SELECT saved_verses, review FROM users WHERE nickname = ?"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, pool_size=8):
+        if path == ":memory:":
+            # 연결끼리 같은 메모리 DB 를 보도록 공유 캐시 사용
+            self._target, self._uri = "file:bible_db?mode=memory&cache=shared", True
+        else:
+            self._target, self._uri = path, False
+        self._pool_size = pool_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.reads = 0
+        self.writes = 0
+
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "nickname TEXT PRIMARY KEY, "
+                "saved_verses TEXT NOT NULL DEFAULT '', "
+                "review TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+            if 'review' not in columns:
+                conn.execute("ALTER TABLE users ADD COLUMN review TEXT NOT NULL DEFAULT ''")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS attempts ("
+                "time REAL NOT NULL, nickname TEXT NOT NULL, verse INTEGER NOT NULL, "
+                "correct INTEGER NOT NULL, hint INTEGER NOT NULL, seconds REAL NOT NULL, "
+                "deck TEXT NOT NULL DEFAULT '')"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(attempts)")}
+            if 'deck' not in columns:
+                conn.execute("ALTER TABLE attempts ADD COLUMN deck TEXT NOT NULL DEFAULT ''")
+
+    def _connect(self):
+        import sqlite3  # 시트 저장소만 쓸 때는 읽지 않음
+        conn = sqlite3.connect(
+            self._target,
+            uri=self._uri,
+            timeout=5,
+            isolation_level=None,  # 트랜잭션은 직접 관리
+            check_same_thread=False,
+            cached_statements=64,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self.connections += 1
+        return conn
+
+    @contextlib.contextmanager
+    def _connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self._pool_size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+
+    def read(self, nickname):
+        with self._connection() as conn:
+            row = conn.execute(self._SELECT, (nickname,)).fetchone()
+        with self._lock:
+            self.reads += 1
+        return dict(zip(FIELDS, row)) if row else None
+
+    def _upsert(self, fields):
+        """필드 조합마다 고정된 SQL 문 (sqlite3 문장 캐시에서 재사용됨)"""
+        columns = [self._COLUMNS[f] for f in fields]
+        return (
+            f"INSERT INTO users (nickname, {', '.join(columns)}) "
+            f"VALUES (?{', ?' * len(columns)}) "
+            f"ON CONFLICT(nickname) DO UPDATE SET "
+            + ', '.join(f"{c} = excluded.{c}" for c in columns)
+        )
+
+    def write_many(self, items):
+        if not items:
+            return
+        groups = {}
+        for nickname, fields in items.items():
+            keys = tuple(f for f in FIELDS if f in fields)
+            groups.setdefault(keys, []).append((nickname, *(fields[f] for f in keys)))
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for keys, rows in groups.items():
+                    conn.executemany(self._upsert(keys), rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        with self._lock:
+            self.writes += 1
+
+    def append_attempts(self, attempts):
+        if not attempts:
+            return
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?)", attempts)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        with self._lock:
+            self.writes += 1
+
+    def read_attempts(self):
+        with self._connection() as conn:
+            rows = conn.execute("SELECT time, nickname, verse, correct, hint, seconds, deck FROM attempts").fetchall()
+        with self._lock:
+            self.reads += 1
+        return rows
+
+    def stats(self):
+        return {'connections': self.connections, 'reads': self.reads, 'writes': self.writes}
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def create_store(config):
+    """설정(dict)에 따라 저장소 생성
+
+    backend: "sheets" (credentials 필요) 또는 "sqlite" (path 선택)
+    """
+    backend = config.get("backend", DEFAULT_BACKEND)
+    if backend == "sqlite":
+        return SqliteUserStore(config.get("path", DEFAULT_SQLITE_PATH))
+    if backend == "sheets":
+        # gspread 는 시트 저장소를 쓸 때만 필요
+        from quota import QuotaUserStore
+        from sheets import SheetsUserStore, is_quota_error
+        return QuotaUserStore(SheetsUserStore(config["credentials"]), retryable=is_quota_error)
+    raise ValueError(f"알 수 없는 저장소: {backend}")
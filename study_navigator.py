@@ -0,0 +1,38 @@
+"""말씀 학습 화면 컴포넌트
+
+한 페이지 분량의 말씀을 한 번에 브라우저로 넘기고, 이전/다음, 슬라이더, 외워보기,
+가리기/보이기는 브라우저 안에서만 처리한다. 서버로는 하트를 눌렀을 때와
+현재 위치(study_idx)를 맞출 때만 값을 보낸다.
+"""
+import os
+
+import streamlit.components.v1 as components
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "study_navigator")
+_component = components.declare_component("study_navigator", path=_FRONTEND)
+
+
+def study_navigator(page_verses, start, total, index, saved, hide, jump=0, key=None):
+    """page_verses 는 현재 페이지의 Verse 목록 (start 는 그 첫 말씀의 순번, total 은 구분 전체 개수)
+    saved 는 저장한 말씀 번호 집합 (VerseSet)
+    jump 를 바꿔 보내면 같은 페이지라도 브라우저 쪽 위치를 index 로 다시 맞춤 (검색 결과로 이동)
+
+    반환값: 마지막으로 보낸 {'seq', 'idx', 'hide', 'heart'} (아직 없으면 None)
+    heart 는 하트를 누른 말씀 번호 (위치만 맞출 때는 None)
+    """
+    # 말씀마다 객체를 만들지 않고 열 단위 목록으로 보냄
+    ids = [v.id for v in page_verses]
+    return _component(
+        start=start,
+        total=total,
+        index=index,
+        ids=ids,
+        cats=[v.category for v in page_verses],
+        addrs=[v.address for v in page_verses],
+        texts=[v.content for v in page_verses],
+        saved=[vid for vid in ids if vid in saved],
+        hide=hide,
+        jump=jump,
+        key=key,
+        default=None,
+    )
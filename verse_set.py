@@ -0,0 +1,91 @@
+"""말씀 번호 집합 (비트셋)
+
+저장한 말씀처럼 번호 집합을 정수 하나의 비트로 들고 있는다. 포함 여부 확인/추가/삭제가
+목록 검색 없이 끝나고, 세션 메모리와 저장 문자열도 작다.
+
+저장 문자열은 "b:" + 비트를 base64url 로 적은 것. 번호가 몇 개 안 되면 예전 형식인
+"1,5,23" 이 더 짧으므로 그쪽을 쓰고, 읽을 때는 두 형식을 모두 읽는다.
+"""
+import base64
+
+PREFIX = 'b:'
+
+
+class VerseSet:
+    __slots__ = ('bits',)
+
+    def __init__(self, ids=()):
+        bits = 0
+        for vid in ids:
+            bits |= 1 << vid
+        self.bits = bits
+
+    def __contains__(self, verse_id):
+        return verse_id >= 0 and (self.bits >> verse_id) & 1 == 1
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __iter__(self):
+        """번호 (작은 것부터)"""
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def __eq__(self, other):
+        return isinstance(other, VerseSet) and self.bits == other.bits
+
+    def __repr__(self):
+        return f"VerseSet({list(self)})"
+
+    def copy(self):
+        new = VerseSet()
+        new.bits = self.bits
+        return new
+
+    def add(self, verse_id):
+        self.bits |= 1 << verse_id
+
+    def discard(self, verse_id):
+        self.bits &= ~(1 << verse_id)
+
+    def toggle(self, verse_id):
+        """넣거나 빼고, 들어 있게 되었으면 True"""
+        self.bits ^= 1 << verse_id
+        return verse_id in self
+
+    def encode(self):
+        if not self.bits:
+            return ''
+        raw = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, 'little')
+        packed = PREFIX + base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+        listed = ','.join(map(str, self))
+        return packed if len(packed) < len(listed) else listed
+
+    @classmethod
+    def decode(cls, text):
+        """저장 문자열 → VerseSet (읽을 수 없는 부분은 무시)"""
+        text = str(text or '').strip()
+        if text.startswith(PREFIX):
+            data = text[len(PREFIX):]
+            try:
+                raw = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+            except ValueError:
+                return cls()
+            new = cls()
+            new.bits = int.from_bytes(raw, 'little')
+            return new
+        ids = []
+        for item in text.split(','):
+            try:
+                vid = int(item)
+            except ValueError:
+                continue
+            if vid >= 0:
+                ids.append(vid)
+        return cls(ids)
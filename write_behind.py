@@ -0,0 +1,168 @@
+"""쓰기 지연(write-behind) 큐
+
+하트를 누를 때마다 스크립트 스레드에서 시트에 바로 쓰지 않고, 닉네임별 최신 값만
+모아 두었다가 백그라운드 스레드에서 한 번에 저장한다.
+값은 {필드: 문자열} 이고, 같은 닉네임의 값은 필드별로 합쳐진다 (나중 값 우선).
+"""
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE = 1.5
+MAX_RETRIES = 5
+BACKOFF = 0.5
+
+
+class RetryingWriter:
+    """백그라운드 저장을 지수 백오프로 재시도 (WriteBehindQueue, attempts.AttemptLog 가 함께 씀)
+
+    하위 클래스는 _max_retries, _backoff 와 batches/retries/failures 수를 두고,
+    로그에 쓸 _label(무엇을 저장하는지), _unit(배치 크기 단위), _logger 를 정한다.
+    """
+    _label = "저장"
+    _unit = "개"
+    _logger = logger
+
+    def _write_with_retry(self, write, batch):
+        """write(batch) 를 _max_retries 번까지 시도. 성공하면 True"""
+        for attempt in range(self._max_retries):
+            try:
+                write(batch)
+                self.batches += 1
+                return True
+            except Exception as e:
+                if attempt + 1 == self._max_retries:
+                    self.failures += 1
+                    self._logger.error("%s 실패 (%d%s): %s", self._label, len(batch), self._unit, e)
+                    return False
+                self.retries += 1
+                delay = self._backoff * (2 ** attempt)
+                self._logger.warning("%s 재시도 %d/%d (%.1f초 후): %s",
+                                     self._label, attempt + 1, self._max_retries, delay, e)
+                time.sleep(delay)
+
+
+class WriteBehindQueue(RetryingWriter):
+    """닉네임별로 필드를 합쳐 두었다가 debounce 후 write_many({닉네임: {필드: 값}}) 로 일괄 저장"""
+    _unit = "명"
+
+    def __init__(self, write_many, debounce=DEBOUNCE, max_retries=MAX_RETRIES, backoff=BACKOFF):
+        self._write_many = write_many
+        self._debounce = debounce
+        self._max_retries = max_retries
+        self._backoff = backoff
+
+        self._cond = threading.Condition()
+        self._pending = {}   # nickname -> (value, due)
+        self._inflight = {}  # 저장 중인 nickname -> value
+        self._closed = False
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.retries = 0
+        self.failures = 0
+
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, nickname, fields):
+        """저장 예약. 같은 닉네임의 대기 중인 값과 합치고 debounce 를 다시 시작"""
+        with self._cond:
+            if nickname in self._pending:
+                self.coalesced += 1
+                fields = {**self._pending[nickname][0], **fields}
+            self._pending[nickname] = (fields, time.monotonic() + self._debounce)
+            self.submitted += 1
+            self._cond.notify_all()
+
+    def pending_value(self, nickname):
+        """아직 저장소에 반영되지 않은 필드 (없으면 None)"""
+        with self._cond:
+            inflight = self._inflight.get(nickname)
+            pending = self._pending.get(nickname)
+            if pending is None:
+                return inflight
+            return {**(inflight or {}), **pending[0]}
+
+    def flush(self, nickname=None, timeout=10):
+        """대기 중인 값을 즉시 저장하고 끝날 때까지 기다림 (nickname 이 없으면 전체)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            for key, (value, due) in list(self._pending.items()):
+                if nickname is None or key == nickname:
+                    self._pending[key] = (value, 0)
+            self._cond.notify_all()
+
+            def done():
+                if nickname is None:
+                    return not self._pending and not self._inflight
+                return nickname not in self._pending and nickname not in self._inflight
+
+            while not done():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout=10):
+        """남은 값을 모두 저장하고 워커 종료"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'submitted': self.submitted,
+                'coalesced': self.coalesced,
+                'batches': self.batches,
+                'retries': self.retries,
+                'failures': self.failures,
+            }
+
+    # --- 워커 ---
+    def _next_batch(self):
+        """저장할 때가 된 항목을 꺼냄. 종료되고 남은 것이 없으면 None"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._pending:
+                    if self._closed:
+                        due_items = list(self._pending)
+                    else:
+                        due_items = [k for k, (_, due) in self._pending.items() if due <= now]
+                    if due_items:
+                        batch = {k: self._pending.pop(k)[0] for k in due_items}
+                        self._inflight.update(batch)
+                        return batch
+                    wait = min(due for _, due in self._pending.values()) - now
+                    self._cond.wait(wait)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            ok = self._write_with_retry(self._write_many, batch)
+            with self._cond:
+                for key, value in batch.items():
+                    self._inflight.pop(key, None)
+                    if not ok and not self._closed:
+                        # 실패한 값은 다시 예약 (그 사이 들어온 값이 우선)
+                        newer = self._pending.get(key, ({}, 0))[0]
+                        self._pending[key] = ({**value, **newer}, time.monotonic() + self._debounce)
+                self._cond.notify_all()